@@ -1,25 +1,37 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
+from app.db import queries
 from app.db.session import get_db
-from app.core.security import oauth2_scheme, SECRET_KEY, ALGORITHM
+from app.core.config import get_settings
+from app.core.security import oauth2_scheme
+from app.models.quiz import Quiz
 from app.models.user import User
 
+def get_user_from_token(db: Session, token: str) -> Optional[User]:
+    # shared by the http dependency and websocket endpoints (token in query string)
+    try:
+        settings = get_settings()
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    return queries.user_by_email(db, email)
+
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
+    user = get_user_from_token(db, token)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+def get_active_quiz(db: Session, quiz_id: int) -> Optional[Quiz]:
+    # soft-deleted quizzes are gone for every endpoint
+    return queries.active_quiz(db, quiz_id)
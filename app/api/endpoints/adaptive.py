@@ -0,0 +1,191 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db import queries
+from app.db.session import get_db
+from app.models.quiz import Attempt, Question, AttemptAnswer, AdaptiveState
+from app.models.user import User
+from app.schemas.quiz import AdaptiveQuestion, AdaptiveStep, NextQuestionRequest
+from app.api.deps import get_active_quiz, get_current_user
+from app.api.msgpack import MsgPackRoute
+from app.core.config import get_settings
+from app.services import irt
+from app.services.adaptive import (
+    administered_ids, dump_posterior, get_item_pool, load_posterior, should_stop
+)
+from app.services.attempts import finish_attempt, time_is_up, update_summaries
+from app.services.versions import current_version_id, get_version_rules
+
+router = APIRouter(route_class=MsgPackRoute)
+
+
+def _step(db: Session, state: AdaptiveState, finished: bool, score=None) -> AdaptiveStep:
+    question = None
+    if not finished and state.current_question_id is not None:
+        question = AdaptiveQuestion.model_validate(db.get(Question, state.current_question_id))
+    return AdaptiveStep(
+        attempt_id=state.attempt_id,
+        ability=state.ability,
+        ability_se=state.ability_se,
+        items_administered=state.items_administered,
+        finished=finished,
+        score=score,
+        question=question
+    )
+
+
+def _finish(db: Session, attempt: Attempt, score: float) -> float:
+    if not finish_attempt(db, attempt.id, score):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="This attempt is already finished")
+    update_summaries(db, [{
+        "user_id": attempt.user_id,
+        "quiz_id": attempt.quiz_id,
+        "score": score,
+        "completed_at": datetime.now(timezone.utc)
+    }])
+    return score
+
+
+@router.post("/{quiz_id}/adaptive/{attempt_id}/next-question", response_model=AdaptiveStep)
+def next_question(
+    quiz_id: int,
+    attempt_id: int,
+    step_in: NextQuestionRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Answer the current question of an adaptive attempt and get the next one.
+    Call without an answer to start the attempt or to fetch the current question again.
+    The attempt finishes once the ability estimate is precise enough or the item limit is hit.
+    """
+    attempt = queries.user_attempt(db, attempt_id, current_user.id, quiz_id)
+    if not attempt:
+        raise HTTPException(status_code=404, detail="Attempt not found")
+
+    quiz = get_active_quiz(db, quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if not quiz.is_adaptive:
+        raise HTTPException(status_code=400, detail="Quiz is not adaptive")
+
+    state = db.get(AdaptiveState, attempt_id)
+    if attempt.completed_at:
+        if state and step_in.answer is None:
+            return _step(db, state, finished=True, score=attempt.score)
+        raise HTTPException(status_code=400, detail="This attempt is already finished")
+
+    # answer key and time limit of the version the attempt started on, later edits don't apply
+    rules = get_version_rules(db, attempt.quiz_version_id or current_version_id(db, quiz))
+    if rules is None:
+        raise HTTPException(status_code=410, detail="The quiz version of this attempt no longer exists")
+    if time_is_up(attempt, rules.time_limit):
+        _finish(db, attempt, 0.0)
+        db.commit()
+        raise HTTPException(status_code=400, detail="Time is up! Result is 0")
+
+    pool = get_item_pool(db, quiz)
+    if not len(pool):
+        raise HTTPException(status_code=400, detail="Quiz has no questions")
+
+    # 1. First call opens the attempt with the most informative item at the prior mean
+    if state is None:
+        log_posterior = irt.initial_log_posterior()
+        ability, ability_se = irt.estimate(log_posterior)
+        state = AdaptiveState(
+            attempt_id=attempt_id,
+            log_posterior=dump_posterior(log_posterior),
+            ability=ability,
+            ability_se=ability_se,
+            items_administered=0,
+            current_question_id=pool.select_next(ability, [])
+        )
+        db.add(state)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            state = db.get(AdaptiveState, attempt_id)
+        return _step(db, state, finished=False)
+
+    # 2. A content edit may have removed the question on screen, move on to another one
+    removed_id = state.current_question_id
+    if removed_id is not None and removed_id not in pool.index:
+        next_id = pool.select_next(state.ability, administered_ids(db, attempt_id))
+        result = db.execute(
+            update(AdaptiveState)
+            .where(AdaptiveState.attempt_id == attempt_id, AdaptiveState.current_question_id == removed_id)
+            .values(current_question_id=next_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1 and next_id is None:
+            # nothing left to ask
+            _finish(db, attempt, pool.expected_score(state.ability))
+        db.commit()
+        db.refresh(state)
+        if step_in.answer is not None and step_in.answer.question_id == removed_id:
+            raise HTTPException(status_code=409, detail="Question was removed from the quiz, fetch the next one")
+        if state.current_question_id is None:
+            db.refresh(attempt)
+            return _step(db, state, finished=True, score=attempt.score)
+
+    if step_in.answer is None:
+        return _step(db, state, finished=False)
+
+    # 3. Only the question currently shown can be answered
+    answer = step_in.answer
+    if answer.question_id != state.current_question_id:
+        raise HTTPException(status_code=409, detail="Answer does not match the current question")
+
+    is_correct = answer.choice_id in rules.answer_key.get(answer.question_id, ())
+
+    item = pool.index[answer.question_id]
+    log_posterior = irt.update_log_posterior(
+        load_posterior(state), pool.a[item], pool.b[item], is_correct
+    )
+    ability, ability_se = irt.estimate(log_posterior)
+    items_administered = state.items_administered + 1
+
+    administered = administered_ids(db, attempt_id) + [answer.question_id]
+    next_id = pool.select_next(ability, administered)
+    settings = get_settings()
+    finished = should_stop(items_administered, ability_se, next_id,
+                           settings.adaptive_max_items, settings.adaptive_target_se)
+
+    # 4. Optimistic update, a concurrent answer to the same question loses
+    db.add(AttemptAnswer(
+        attempt_id=attempt_id,
+        question_id=answer.question_id,
+        choice_id=answer.choice_id,
+        is_correct=is_correct
+    ))
+    result = db.execute(
+        update(AdaptiveState)
+        .where(
+            AdaptiveState.attempt_id == attempt_id,
+            AdaptiveState.items_administered == state.items_administered
+        )
+        .values(
+            log_posterior=dump_posterior(log_posterior),
+            ability=ability,
+            ability_se=ability_se,
+            items_administered=items_administered,
+            current_question_id=None if finished else next_id
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Question was already answered")
+
+    score = None
+    if finished:
+        score = _finish(db, attempt, pool.expected_score(ability))
+
+    db.commit()
+    db.refresh(state)
+    return _step(db, state, finished=finished, score=score)
@@ -0,0 +1,145 @@
+import json
+from typing import Callable, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db, get_session_factory
+from app.models.quiz import QuizVersion
+from app.models.user import User
+from app.schemas.live import LiveSessionCreate, LiveSessionResponse
+from app.api.deps import get_active_quiz, get_current_user, get_user_from_token
+from app.services.live import LivePlayer, LiveSession, live_sessions
+from app.services.versions import current_version_id, get_version_rules
+
+router = APIRouter()
+
+
+def _parse(text: str) -> dict:
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return {}
+    return message if isinstance(message, dict) else {}
+
+
+def _authenticate(new_session: Callable[[], Session], token: str) -> Optional[Tuple[int, str]]:
+    # the session is closed before the socket is accepted, sockets hold no connection
+    with new_session() as db:
+        user = get_user_from_token(db, token)
+        return (user.id, user.username) if user else None
+
+
+def _persist(new_session: Callable[[], Session], session: LiveSession) -> int:
+    with new_session() as db:
+        return session.persist_results(db)
+
+
+@router.post("/sessions", response_model=LiveSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_live_session(
+    session_in: LiveSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Open a live session on a quiz. Players join with the returned code.
+    The session plays the quiz version that is current right now.
+    """
+    quiz = get_active_quiz(db, session_in.quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    version_id = current_version_id(db, quiz)
+    rules = get_version_rules(db, version_id)
+    if not rules or not rules.answer_key:
+        raise HTTPException(status_code=400, detail="Quiz has no questions")
+
+    return live_sessions.create(
+        db.get(QuizVersion, version_id),
+        rules,
+        host_id=current_user.id,
+        question_seconds=session_in.question_seconds,
+        reveal_seconds=session_in.reveal_seconds
+    )
+
+
+@router.get("/sessions/{code}", response_model=LiveSessionResponse)
+def get_live_session(code: str):
+    """
+    Check that a session exists and what state it is in.
+    """
+    session = live_sessions.get(code)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+@router.websocket("/sessions/{code}/host")
+async def host_live_session(
+    websocket: WebSocket,
+    code: str,
+    token: str,
+    new_session: Callable[[], Session] = Depends(get_session_factory)
+):
+    """
+    Host socket. Receives lobby updates, sends {"action": "start"} to run the quiz.
+    Results are saved as attempts once the last question is over.
+    """
+    session = live_sessions.get(code)
+    user = await run_in_threadpool(_authenticate, new_session, token)
+    # reserving is synchronous, so two host sockets cannot both pass this check
+    if not session or not user or user[0] != session.host_id or not session.reserve_host():
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    host = LivePlayer(*user, websocket)
+    session.attach_host(host)
+    host.send(json.dumps({"type": "lobby", "players": len(session.players)}))
+    try:
+        while True:
+            if _parse(await websocket.receive_text()).get("action") == "start":
+                break
+
+        await session.run()
+        await run_in_threadpool(_persist, new_session, session)
+    except WebSocketDisconnect:
+        # host left before starting, the session is abandoned
+        pass
+    finally:
+        live_sessions.remove(session.code)
+        await session.close()
+
+
+@router.websocket("/sessions/{code}/play")
+async def play_live_session(
+    websocket: WebSocket,
+    code: str,
+    token: str,
+    new_session: Callable[[], Session] = Depends(get_session_factory)
+):
+    """
+    Player socket. Receives questions and leaderboards,
+    answers with {"question_id": ..., "choice_id": ...}.
+    """
+    session = live_sessions.get(code)
+    user = await run_in_threadpool(_authenticate, new_session, token)
+    if not session or not user or session.state == "finished":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    player = LivePlayer(*user, websocket)
+    session.join(player)
+    player.send(json.dumps({"type": "joined", "code": session.code, "quiz_id": session.quiz_id}))
+    try:
+        while True:
+            message = _parse(await websocket.receive_text())
+            try:
+                session.submit_answer(player.user_id, int(message["question_id"]), int(message["choice_id"]))
+            except (KeyError, TypeError, ValueError):
+                # malformed answers are ignored, the socket stays open
+                continue
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await player.close()
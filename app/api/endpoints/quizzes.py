@@ -1,16 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import msgpack
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from sqlalchemy import desc
+from sqlalchemy import and_, desc, or_, select
 from datetime import datetime, timezone
 
+from app.db import queries
 from app.db.session import get_db
-from app.models.quiz import Quiz, Question, Choice, Attempt, Category
-from app.schemas.quiz import QuizCreate, QuizResponse, QuizSubmission, AttemptResponse, QuizUpdate
-from app.api.deps import get_current_user
+from app.models.quiz import (
+    Quiz, QuizVersion, Question, Choice, Attempt, Category, SubmissionReceipt, RegradeJob,
+    AttemptSummary
+)
+from app.schemas.quiz import (
+    QuizCreate, QuizResponse, QuizSubmission, AttemptResponse, QuizUpdate, QuizContentPatch,
+    RegradeJobResponse, RegradeRequest, AttemptSummaryResponse, DuplicateCheckRequest, DuplicateReport,
+    QuizMonthStats
+)
+from app.api.deps import get_active_quiz, get_current_user
+from app.api.msgpack import MsgPackRoute, accepts_msgpack
+from app.core.cache import CachedPayload, quiz_payloads
+from app.core.config import get_settings
+from app.services.archive import get_archive
+from app.services.attempts import finish_attempt, monthly_stats, record_answers, time_is_up, update_summaries
+from app.services.content import ContentPatchError, apply_content_patch
+from app.services.dedup import find_duplicates, index_questions
+from app.jobs.purge import purge_in_background
+from app.jobs.regrade import RegradeConflict, create_regrade_job, regrade_in_background
+from app.services.versions import current_version_id, get_version_rules, snapshot_quiz
+from app.core.compression import choose_encoding
 from app.models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=MsgPackRoute)
 
 @router.post("/", response_model=QuizResponse, status_code=status.HTTP_201_CREATED)
 def create_quiz(
@@ -22,7 +42,7 @@ def create_quiz(
     Create a new quiz with questions and choices.
     """
     if quiz_data.category_id:
-        category = db.query(Category).get(quiz_data.category_id)
+        category = db.get(Category, quiz_data.category_id)
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
 
@@ -32,16 +52,19 @@ def create_quiz(
         description=quiz_data.description,
         creator_id=current_user.id,
         category_id=quiz_data.category_id,
-        time_limit=quiz_data.time_limit
+        time_limit=quiz_data.time_limit,
+        is_adaptive=quiz_data.is_adaptive
     )
     db.add(new_quiz)
     db.flush() 
 
     # 2. Process questions
+    indexed = []
     for q_data in quiz_data.questions:
         new_question = Question(text=q_data.text, quiz_id=new_quiz.id)
         db.add(new_question)
         db.flush()
+        indexed.append((new_question.id, new_question.text))
 
         # 3. Process answer choices
         for c_data in q_data.choices:
@@ -52,11 +75,32 @@ def create_quiz(
             )
             db.add(new_choice)
 
+    # near-duplicate index, see POST /quizzes/duplicates
+    index_questions(db, indexed)
+    snapshot_quiz(db, new_quiz)
     db.commit()
     db.refresh(new_quiz)
     return new_quiz
 
 
+@router.post("/duplicates", response_model=List[DuplicateReport])
+def check_duplicates(
+    check: DuplicateCheckRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Flag near-duplicates of question texts before importing them: questions already
+    in the bank and repeats within the request. Only flagged texts are returned.
+    """
+    threshold = check.threshold or get_settings().dedup_threshold
+    found = find_duplicates(db, check.questions, threshold)
+    return [
+        {"index": index, "text": text, "matches": matches}
+        for index, (text, matches) in enumerate(zip(check.questions, found)) if matches
+    ]
+
+
 @router.get("/", response_model=List[QuizResponse])
 def get_all_quizzes(
     category_id: Optional[int] = None,
@@ -65,7 +109,7 @@ def get_all_quizzes(
     """
     Get all quizzes with optional category filtering.
     """
-    query = db.query(Quiz)
+    query = db.query(Quiz).filter(Quiz.deleted_at.is_(None))
     if category_id:
         query = query.filter(Quiz.category_id == category_id)
     return query.all()
@@ -79,20 +123,83 @@ def get_my_quizzes(
     """
     Get all quizzes created by the current user.
     """
-    return db.query(Quiz).filter(Quiz.creator_id == current_user.id).all()
+    return db.query(Quiz).filter(Quiz.creator_id == current_user.id, Quiz.deleted_at.is_(None)).all()
 
 
 @router.get("/my-attempts", response_model=List[AttemptResponse])
 def get_my_attempts(
+    response: Response,
+    since: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get current user's quiz attempts ordered by date.
+    Get current user's quiz attempts ordered by date, newest first, one page at a time.
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one.
+    Passing `since` lets postgres skip the monthly partitions before it.
+    Attempts moved to the archive follow after the ones still in the database.
     """
-    return db.query(Attempt).filter(
-        Attempt.user_id == current_user.id
-    ).order_by(Attempt.created_at.desc()).all()
+    query = db.query(Attempt).filter(Attempt.user_id == current_user.id)
+    if since:
+        query = query.filter(Attempt.created_at >= since)
+    if cursor:
+        # keyset on (created_at, id) of the cursor row, compared inside the database
+        cursor_at = select(Attempt.created_at).where(
+            Attempt.id == cursor, Attempt.user_id == current_user.id
+        ).scalar_subquery()
+        query = query.filter(or_(
+            Attempt.created_at < cursor_at,
+            and_(Attempt.created_at == cursor_at, Attempt.id < cursor)
+        ))
+
+    attempts = query.order_by(Attempt.created_at.desc(), Attempt.id.desc()).limit(limit + 1).all()
+    archive = get_archive()
+    if len(attempts) <= limit and archive is not None:
+        # the table ran out, archived attempts are all older than the ones left in it
+        before = None
+        if attempts:
+            before = (attempts[-1].created_at, attempts[-1].id)
+        elif cursor:
+            before = db.execute(
+                select(Attempt.created_at, Attempt.id).where(Attempt.id == cursor, Attempt.user_id == current_user.id)
+            ).first()
+        archived = archive.user_history(current_user.id, limit + 1 - len(attempts), since, before,
+                                        cursor if before is None else None)
+        attempts += [AttemptResponse(**a) for a in archived]
+    if len(attempts) > limit:
+        attempts = attempts[:limit]
+        response.headers["X-Next-Cursor"] = str(attempts[-1].id)
+    return attempts
+
+
+@router.get("/my-summary", response_model=List[AttemptSummaryResponse])
+def get_my_summary(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Attempt count, best, last and average score per quiz for the current user.
+    Read from attempt_summaries, which submits keep up to date.
+    """
+    rows = db.query(AttemptSummary, Quiz.title).join(Quiz, Quiz.id == AttemptSummary.quiz_id).filter(
+        AttemptSummary.user_id == current_user.id,
+        Quiz.deleted_at.is_(None)
+    ).order_by(AttemptSummary.last_attempt_at.desc()).all()
+
+    return [
+        {
+            "quiz_id": summary.quiz_id,
+            "quiz_title": title,
+            "attempt_count": summary.attempt_count,
+            "best_score": summary.best_score,
+            "last_score": summary.last_score,
+            "average_score": summary.score_sum / summary.attempt_count,
+            "last_attempt_at": summary.last_attempt_at
+        }
+        for summary, title in rows
+    ]
 
 
 @router.post("/{quiz_id}/start", response_model=AttemptResponse)
@@ -104,13 +211,14 @@ def start_quiz(
     """
     Start a new quiz attempt and trigger the timer.
     """
-    quiz = db.query(Quiz).get(quiz_id)
+    quiz = get_active_quiz(db, quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
     new_attempt = Attempt(
         user_id=current_user.id,
         quiz_id=quiz_id,
+        quiz_version_id=current_version_id(db, quiz),
         score=0.0
     )
     db.add(new_attempt)
@@ -119,15 +227,71 @@ def start_quiz(
     return new_attempt
 
 
+def _version_response(request: Request, db: Session, quiz_id: int, version_id: str, cache_control: str) -> Response:
+    # versions are immutable, so the rendered body never needs invalidating
+    etag = f'W/"{version_id}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    as_msgpack = accepts_msgpack(request.headers.get("accept", ""))
+    key = (version_id, "msgpack" if as_msgpack else "json")
+
+    payload = quiz_payloads.get(key)
+    if payload is None:
+        version = db.get(QuizVersion, version_id)
+        if not version or version.quiz_id != quiz_id:
+            raise HTTPException(status_code=404, detail="Quiz version not found")
+        content = {**version.content, "version_id": version_id}
+        if as_msgpack:
+            payload = CachedPayload(msgpack.packb(content), "application/msgpack")
+        else:
+            payload = CachedPayload(QuizResponse.model_validate(content).model_dump_json().encode(), "application/json")
+        quiz_payloads.put(key, payload)
+
+    encoding = None
+    if len(payload.body) >= get_settings().compression_minimum_size:
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    response = Response(content=payload.encoded(encoding), media_type=payload.media_type)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
 @router.get("/{quiz_id}", response_model=QuizResponse)
-def get_quiz_by_id(quiz_id: int, db: Session = Depends(get_db)):
+def get_quiz_by_id(quiz_id: int, request: Request, db: Session = Depends(get_db)):
     """
-    Get detailed information about a specific quiz.
+    Get the current version of a quiz.
+    Bodies and their gzip/brotli variants are cached per immutable version, hot quizzes are compressed once.
     """
-    quiz = db.query(Quiz).get(quiz_id)
-    if not quiz:
+    # only the version id is needed on the hot path, the cached body does the rest
+    row = queries.active_quiz_version(db, quiz_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    return quiz
+    version_id = row.version_id or current_version_id(db, get_active_quiz(db, quiz_id))
+    return _version_response(request, db, quiz_id, version_id, "no-cache")
+
+
+@router.get("/{quiz_id}/versions/{version_id}", response_model=QuizResponse)
+def get_quiz_version(quiz_id: int, version_id: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Get one immutable version of a quiz, cacheable by clients and proxies forever.
+    """
+    if not get_active_quiz(db, quiz_id):
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return _version_response(request, db, quiz_id, version_id, "public, max-age=31536000, immutable")
+
+
+def _get_receipt(db: Session, user_id: int, attempt_id: int, key: str) -> Optional[SubmissionReceipt]:
+    return queries.submission_receipt(db, user_id, attempt_id, key)
+
+
+def _replay(receipt: SubmissionReceipt) -> dict:
+    if receipt.status_code != status.HTTP_200_OK:
+        raise HTTPException(status_code=receipt.status_code, detail=receipt.response["detail"])
+    return receipt.response
 
 
 @router.post("/{quiz_id}/submit/{attempt_id}", response_model=AttemptResponse)
@@ -136,16 +300,21 @@ def submit_quiz(
     attempt_id: int,
     submission: QuizSubmission,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255)
 ):
     """
     Submit answers, check time limit, and calculate final score.
+    Retries sent with the same Idempotency-Key header get the original response back.
     """
+    # 0. Replay the stored response for retried requests
+    if idempotency_key:
+        receipt = _get_receipt(db, current_user.id, attempt_id, idempotency_key)
+        if receipt:
+            return _replay(receipt)
+
     # 1. Validate attempt
-    attempt = db.query(Attempt).filter(
-        Attempt.id == attempt_id, 
-        Attempt.user_id == current_user.id
-    ).first()
+    attempt = queries.user_attempt(db, attempt_id, current_user.id, quiz_id)
     
     if not attempt:
         raise HTTPException(status_code=404, detail="Attempt not found")
@@ -153,63 +322,101 @@ def submit_quiz(
     if attempt.completed_at:
         raise HTTPException(status_code=400, detail="This attempt is already finished")
 
-    quiz = db.query(Quiz).get(quiz_id)
+    quiz = get_active_quiz(db, quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.is_adaptive:
+        raise HTTPException(status_code=400, detail="Adaptive quiz, answer through next-question")
+
+    # 2. Time limit and answer key of the version the attempt started on, later edits don't apply
+    rules = get_version_rules(db, attempt.quiz_version_id or current_version_id(db, quiz))
+    if rules is None:
+        raise HTTPException(status_code=410, detail="The quiz version of this attempt no longer exists")
+
+    # 3. Timer check
+    out_of_time = time_is_up(attempt, rules.time_limit)
+
+    # 4. Calculate score
+    if out_of_time:
+        score = 0.0
+    else:
+        answer_key = rules.answer_key
+        if not answer_key:
+            raise HTTPException(status_code=400, detail="Quiz has no questions")
+
+        user_answers = {ans.question_id: ans.choice_id for ans in submission.answers}
+        correct_count = sum(
+            1 for question_id, correct_ids in answer_key.items()
+            if user_answers.get(question_id) in correct_ids
+        )
+
+        score = (correct_count / len(answer_key)) * 100
+
+    # 5. Finalize attempt, losing a race with a concurrent submit is not an error for retries
+    if not finish_attempt(db, attempt.id, score):
+        db.rollback()
+        if idempotency_key:
+            receipt = _get_receipt(db, current_user.id, attempt_id, idempotency_key)
+            if receipt:
+                return _replay(receipt)
+        raise HTTPException(status_code=400, detail="This attempt is already finished")
 
-    # 2. Timer check
-    if quiz.time_limit:
-        now = datetime.now(timezone.utc)
-        start_time = attempt.started_at.replace(tzinfo=timezone.utc) if attempt.started_at.tzinfo is None else attempt.started_at
-        
-        elapsed_time = (now - start_time).total_seconds()
-        
-        if elapsed_time > (quiz.time_limit + 10):
-            attempt.score = 0.0
-            db.commit()
-            raise HTTPException(status_code=400, detail="Time is up! Result is 0")
-
-    # 3. Calculate score
-    questions = db.query(Question).filter(Question.quiz_id == quiz_id).all()
-    if not questions:
-        raise HTTPException(status_code=400, detail="Quiz has no questions")
-
-    user_answers = {ans.question_id: ans.choice_id for ans in submission.answers}
-    correct_count = 0
-
-    for question in questions:
-        submitted_choice_id = user_answers.get(question.id)
-        if submitted_choice_id:
-            choice = db.query(Choice).filter(
-                Choice.id == submitted_choice_id, 
-                Choice.question_id == question.id
-            ).first()
-            if choice and choice.is_correct:
-                correct_count += 1
+    # answers are kept for re-grading when the answer key is fixed later
+    if not out_of_time:
+        record_answers(db, attempt.id, quiz_id, user_answers, answer_key)
 
-    # 4. Update attempt
-    attempt.score = (correct_count / len(questions)) * 100
-    db.commit()
     db.refresh(attempt)
-    return attempt
+    update_summaries(db, [{
+        "user_id": attempt.user_id,
+        "quiz_id": attempt.quiz_id,
+        "score": attempt.score,
+        "completed_at": attempt.completed_at
+    }])
+    if out_of_time:
+        status_code = status.HTTP_400_BAD_REQUEST
+        content = {"detail": "Time is up! Result is 0"}
+    else:
+        status_code = status.HTTP_200_OK
+        content = AttemptResponse.model_validate(attempt).model_dump(mode="json")
+
+    # receipt is written in the same transaction as the finalizing UPDATE
+    if idempotency_key:
+        db.add(SubmissionReceipt(
+            user_id=current_user.id,
+            attempt_id=attempt.id,
+            idempotency_key=idempotency_key,
+            status_code=status_code,
+            response=content
+        ))
+    db.commit()
+
+    if out_of_time:
+        raise HTTPException(status_code=status_code, detail=content["detail"])
+    return content
 
 
 @router.delete("/{quiz_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_quiz(
     quiz_id: int, 
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a quiz. Only the creator can perform this action.
+    The quiz is hidden at once; its questions, choices and attempts are purged in batches afterwards.
     """
-    quiz = db.query(Quiz).get(quiz_id)
+    quiz = get_active_quiz(db, quiz_id)
     
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     if quiz.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
-    db.delete(quiz)
+    quiz.deleted_at = datetime.now(timezone.utc)
     db.commit()
+    if get_settings().purge_on_delete:
+        background_tasks.add_task(purge_in_background, quiz_id)
     return None
 
 
@@ -223,7 +430,7 @@ def update_quiz(
     """
     Update quiz details partially.
     """
-    quiz = db.query(Quiz).get(quiz_id)
+    quiz = get_active_quiz(db, quiz_id)
     
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
@@ -235,29 +442,151 @@ def update_quiz(
     for field, value in update_data.items():
         setattr(quiz, field, value)
 
+    # copy-on-write, attempts in progress keep the version they started on
+    snapshot_quiz(db, quiz)
     db.commit()
     db.refresh(quiz)
     return quiz
 
 
+@router.patch("/{quiz_id}/content", response_model=QuizResponse)
+def update_quiz_content(
+    quiz_id: int,
+    patch: QuizContentPatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Add, update and remove questions and choices by id in one transaction.
+    Only the rows named in the patch are written; a new quiz version is created.
+    """
+    # row lock serializes concurrent editors of the same quiz
+    quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.deleted_at.is_(None)).with_for_update().first()
+
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if patch.base_version_id and patch.base_version_id != quiz.version_id:
+        raise HTTPException(status_code=409, detail="Quiz was changed since this version")
+
+    try:
+        apply_content_patch(db, quiz_id, patch)
+    except ContentPatchError as e:
+        # raised before anything is written
+        raise HTTPException(status_code=400, detail=str(e))
+
+    version_id = snapshot_quiz(db, quiz)
+    db.commit()
+    # the snapshot is the rendered quiz, no need to load every question again
+    return {**db.get(QuizVersion, version_id).content, "version_id": version_id}
+
+
+@router.post("/{quiz_id}/regrade", response_model=RegradeJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def regrade_quiz(
+    quiz_id: int,
+    background_tasks: BackgroundTasks,
+    regrade_in: Optional[RegradeRequest] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Re-score all finished attempts against the answer key of a version (default: current).
+    Runs in the background in chunks; poll the returned job for progress.
+    """
+    quiz = get_active_quiz(db, quiz_id)
+
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if quiz.is_adaptive:
+        raise HTTPException(status_code=400, detail="Adaptive quizzes are scored by ability, not by key")
+
+    version_id = (regrade_in and regrade_in.version_id) or current_version_id(db, quiz)
+    version = db.get(QuizVersion, version_id)
+    if not version or version.quiz_id != quiz_id:
+        raise HTTPException(status_code=404, detail="Quiz version not found")
+
+    try:
+        job = create_regrade_job(db, quiz_id, version_id)
+    except RegradeConflict:
+        raise HTTPException(status_code=409, detail="A regrade of this quiz is already pending or running")
+    if get_settings().regrade_in_background:
+        background_tasks.add_task(regrade_in_background, job.id)
+    return job
+
+
+@router.get("/{quiz_id}/regrade/{job_id}", response_model=RegradeJobResponse)
+def get_regrade_job(
+    quiz_id: int,
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Progress of a re-grade job.
+    """
+    quiz = get_active_quiz(db, quiz_id)
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    job = db.get(RegradeJob, job_id)
+    if not job or job.quiz_id != quiz_id:
+        raise HTTPException(status_code=404, detail="Regrade job not found")
+    return job
+
+
+@router.get("/{quiz_id}/stats", response_model=List[QuizMonthStats])
+def get_quiz_stats(quiz_id: int, db: Session = Depends(get_db)):
+    """
+    Monthly attempt counts and scores over the quiz's whole history, archive included.
+    """
+    if not get_active_quiz(db, quiz_id):
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return monthly_stats(db, quiz_id)
+
+
 @router.get("/{quiz_id}/leaderboard")
 def get_quiz_leaderboard(
     quiz_id: int, 
     db: Session = Depends(get_db),
-    limit: int = 10
+    limit: int = 10,
+    since: Optional[datetime] = None
 ):
     """
     Get the top scores for a specific quiz.
+    Passing `since` (e.g. this month) limits the scan to recent partitions.
     """
-    leaderboard = db.query(Attempt, User).join(User, Attempt.user_id == User.id).filter(
+    if not get_active_quiz(db, quiz_id):
+        raise HTTPException(status_code=404, detail="Quiz not found")
+
+    query = db.query(Attempt, User).join(User, Attempt.user_id == User.id).filter(
         Attempt.quiz_id == quiz_id
-    ).order_by(desc(Attempt.score)).limit(limit).all()
-    
+    )
+    if since:
+        query = query.filter(Attempt.created_at >= since)
+    leaderboard = [
+        (attempt.score, user.username, attempt.created_at)
+        for attempt, user in query.order_by(desc(Attempt.score)).limit(limit).all()
+    ]
+
+    archive = get_archive()
+    archived = archive.quiz_top(quiz_id, limit, since) if archive else []
+    if archived:
+        names = dict(db.execute(
+            select(User.id, User.username).where(User.id.in_({a["user_id"] for a in archived}))
+        ).all())
+        leaderboard += [(a["score"], names[a["user_id"]], a["created_at"]) for a in archived if a["user_id"] in names]
+        leaderboard = sorted(leaderboard, key=lambda entry: -(entry[0] or 0.0))[:limit]
+
     return [
         {
-            "username": user.username,
-            "score": attempt.score,
-            "date": attempt.created_at.strftime("%Y-%m-%d %H:%M")
+            "username": username,
+            "score": score,
+            "date": created_at.strftime("%Y-%m-%d %H:%M")
         }
-        for attempt, user in leaderboard
+        for score, username, created_at in leaderboard
     ]
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+MessagePack content negotiation for API routes.
+
+Routers built with `route_class=MsgPackRoute` answer with msgpack when the
+client sends `Accept: application/msgpack` and accept msgpack request bodies
+sent with `Content-Type: application/msgpack`. JSON stays the default.
+"""
+import json
+from typing import Any, Callable, Coroutine
+
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class MsgPackRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = msgpack.unpackb(await self.body(), raw=False)
+            except (ValueError, msgpack.UnpackException):
+                raise HTTPException(status_code=400, detail="Invalid msgpack body")
+        return self._json
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def accepts_msgpack(accept: str) -> bool:
+    """
+    True if the Accept header ranks msgpack at least as high as JSON.
+    """
+    msgpack_q = json_q = 0.0
+    for part in accept.split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def _as_json_request(request: Request) -> Request:
+    # FastAPI only parses bodies it recognises as JSON, so present the msgpack
+    # body as such and decode it in MsgPackRequest.json()
+    headers = [
+        (name, b"application/json" if name == b"content-type" else value)
+        for name, value in request.scope["headers"]
+    ]
+    return MsgPackRequest({**request.scope, "headers": headers}, request.receive)
+
+
+class MsgPackRoute(APIRoute):
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            if _media_type(request.headers.get("content-type", "")) in MSGPACK_MEDIA_TYPES:
+                request = _as_json_request(request)
+
+            # JSON clients keep FastAPI's fast path (pydantic dumps JSON bytes directly),
+            # msgpack clients pay one extra C-level json.loads before packing
+            response = await handler(request)
+            body = getattr(response, "body", None)
+            if (
+                body
+                and "content-encoding" not in response.headers
+                and accepts_msgpack(request.headers.get("accept", ""))
+                and _media_type(response.headers.get("content-type", "")) == "application/json"
+            ):
+                packed = Response(
+                    content=msgpack.packb(json.loads(body), use_bin_type=True),
+                    status_code=response.status_code,
+                    media_type=MSGPACK_MEDIA_TYPES[0],
+                    background=response.background,
+                )
+                packed.raw_headers.extend(
+                    (name, value) for name, value in response.raw_headers
+                    if name not in (b"content-length", b"content-type")
+                )
+                response = packed
+            response.headers.append("Vary", "Accept")
+            return response
+
+        return negotiated_handler
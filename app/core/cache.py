@@ -0,0 +1,77 @@
+"""
+In-process caches.
+
+CachedPayload keeps a serialized response body plus its compressed variants,
+built on first request per encoding, so a hot payload is serialized and
+compressed once.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.compression import compress
+
+
+class CachedPayload:
+    def __init__(self, body: bytes, media_type: str):
+        self.body = body
+        self.media_type = media_type
+        self._variants: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        variant = self._variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding, best=True)
+            self._variants[encoding] = variant
+        return variant
+
+
+class LRUCache:
+    """
+    Thread-safe LRU with an optional TTL (0 disables expiry). For shared data the
+    TTL bounds how long other workers may serve an entry that was invalidated
+    only in the worker that handled the edit.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# rendered QuizResponse bodies keyed by (version id, media type), sized from settings in create_app();
+# versions are immutable so entries never expire
+quiz_payloads = LRUCache(ttl_seconds=0)
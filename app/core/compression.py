@@ -0,0 +1,201 @@
+"""
+gzip / brotli response compression.
+
+CompressionMiddleware negotiates Accept-Encoding per request, leaves small bodies
+and already encoded responses alone and compresses streaming responses as they
+go, flushing every STREAM_FLUSH_SIZE bytes of input. `compress()` is also used to precompress cached payloads once.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+# streamed input is flushed to the client once this much has piled up. Flushing
+# after every ASGI chunk (often a single CSV row) resets the compressor's block
+# each time and gives up most of the ratio.
+STREAM_FLUSH_SIZE = 32 * 1024
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Best supported encoding from an Accept-Encoding header, brotli preferred on ties.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    One-shot compression. `best` trades CPU for size, meant for payloads compressed once and reused.
+    """
+    if encoding == "br":
+        # quality 11 is ~20x slower than 9 for ~3% smaller output
+        return brotli.compress(data, quality=9 if best else 5)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(9 if best else 6, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, flush_size: int = STREAM_FLUSH_SIZE):
+        self.encoding = encoding
+        self.flush_size = flush_size
+        self._pending = 0
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=5)
+        else:
+            self._zlib = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """
+        Compressed bytes ready to send, often empty until flush_size bytes came in.
+        """
+        self._pending += len(data)
+        flush = self._pending >= self.flush_size
+        if flush:
+            self._pending = 0
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            # the answer still depends on Accept-Encoding, caches must key on it
+            async def send_with_vary(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                await send(message)
+
+            await self.app(scope, receive, send_with_vary)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[_StreamCompressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # held back until the first body chunk tells us how big the response is
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            # set on uncompressed responses too, or a cache could serve them to
+            # clients that asked for compression
+            headers.add_vary_header("Accept-Encoding")
+            if (
+                "content-encoding" in headers
+                or not is_compressible(headers.get("content-type"))
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            if not more_body:
+                body = compress(body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            # streaming response, length is unknown up front
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(self.encoding)
+            await self._send(start)
+            data = self.compressor.chunk(body)
+            if data:
+                await self._send({"type": "http.response.body", "body": data, "more_body": True})
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        data = self.compressor.chunk(body)
+        if not more_body:
+            data += self.compressor.finish()
+        elif not data:
+            # still buffered in the compressor
+            return
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
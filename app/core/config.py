@@ -0,0 +1,85 @@
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+
+class Settings(BaseModel):
+    """
+    All runtime configuration in one place.
+    Built once per process by get_settings() or passed to create_app() explicitly.
+    """
+    database_url: Optional[str] = None
+    secret_key: Optional[str] = None
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+    # server-side prepared statements on postgres (psycopg 3), 0 disables
+    database_prepare_threshold: int = 2
+
+    # attempts partition maintenance, see app/db/partitions.py
+    attempts_partitions_ahead: int = 3
+    attempts_retention_months: int = 0
+    attempts_retention_mode: str = "detach"
+
+    # responses smaller than this are sent uncompressed
+    compression_minimum_size: int = 1024
+    quiz_cache_max_entries: int = 1024
+
+    # live sessions are kept in process memory, so the /live routes are only
+    # served by a process started with this on and a single worker (gunicorn.conf.py)
+    live_enabled: bool = False
+
+    # deleted quizzes are purged right after the request in a background task,
+    # the periodic job (python -m app.jobs.purge) picks up anything left over
+    purge_on_delete: bool = True
+    purge_batch_size: int = 1000
+
+    # attempts re-scored per transaction by app/jobs/regrade.py
+    regrade_chunk_size: int = 5000
+    regrade_in_background: bool = True
+    # active jobs without progress for this long are resumed by app.jobs.regrade --resume-stale
+    regrade_stale_minutes: int = 15
+
+    # columnar archive of old attempts (app/jobs/archive.py), unset keeps everything in the database
+    archive_dir: Optional[str] = None
+    archive_after_months: int = 12
+    archive_batch_size: int = 5000
+
+    # estimated Jaccard similarity from which questions count as near-duplicates
+    dedup_threshold: float = 0.8
+
+    # adaptive quizzes stop at whichever comes first
+    adaptive_max_items: int = 30
+    adaptive_target_se: float = 0.3
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        # .env only fills variables that are not already set
+        load_dotenv()
+        values = {}
+        for name in cls.model_fields:
+            value = os.getenv(name.upper())
+            if value is not None:
+                values[name] = value
+        return cls(**values)
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
+
+
+def set_settings(settings: Settings) -> None:
+    """
+    Replace process settings, the engine is rebuilt from them on next use.
+    """
+    global _settings
+    _settings = settings
+
+    from app.db.session import dispose_engine
+    dispose_engine()
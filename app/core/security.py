@@ -1,37 +1,35 @@
-import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Union
 from jose import jwt
 from passlib.context import CryptContext
-from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
-
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import get_settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+@lru_cache(maxsize=None)
+def get_pwd_context() -> CryptContext:
+    # built on first hash/verify instead of at import
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # check plain password with hash from db
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     # turn password into hash to store in db
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+    settings = get_settings()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
 
 
     to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    return encoded_jwt
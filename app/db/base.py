@@ -1,3 +1,3 @@
 from app.db.base_class import Base
 from app.models.user import User
-from app.models.quiz import Quiz, Question, Choice, Attempt
\ No newline at end of file
+from app.models.quiz import Quiz, QuizVersion, Question, Choice, Attempt, AttemptSummary, SubmissionReceipt, AttemptAnswer, AdaptiveState, RegradeJob, QuestionSignature, QuestionBucket
\ No newline at end of file
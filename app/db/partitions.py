@@ -0,0 +1,148 @@
+"""
+Monthly range partitions of the attempts table (postgres only).
+
+Run periodically, e.g. daily from cron:
+    python -m app.db.partitions --ahead 3 --retention-months 24 --mode detach
+"""
+import argparse
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import get_settings
+from app.db.session import get_engine
+
+PARENT_TABLE = "attempts"
+DEFAULT_PARTITION = "attempts_default"
+PARTITION_NAME = re.compile(r"^attempts_p(\d{4})(\d{2})$")
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"attempts_p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def retention_cutoff(retention_months: int, now: Optional[datetime] = None) -> date:
+    """
+    First month that is still kept, partitions for earlier months are expired.
+    """
+    now = now or datetime.now(timezone.utc)
+    return add_months(month_start(now), -retention_months)
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT_TABLE})
+    return [row[0] for row in rows]
+
+
+def create_partition(conn: Connection, month: date) -> bool:
+    """
+    Create and attach the partition for one month.
+    Rows that already landed in the default partition for that month are moved first,
+    otherwise ATTACH would fail. Returns False if the partition already exists.
+    """
+    name = partition_name(month)
+    if name in list_partitions(conn):
+        return False
+
+    bounds = {"lo": month, "hi": add_months(month, 1)}
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lo AND created_at < :hi RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['lo'].isoformat()}') TO ('{bounds['hi'].isoformat()}')"
+    ))
+    return True
+
+
+def ensure_future_partitions(conn: Connection, ahead: int, now: Optional[datetime] = None) -> List[str]:
+    """
+    Make sure the current month and the next `ahead` months have partitions.
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(conn, month):
+            created.append(partition_name(month))
+    return created
+
+
+def expire_partitions(
+    conn: Connection,
+    retention_months: int,
+    mode: str = "detach",
+    now: Optional[datetime] = None
+) -> List[Tuple[str, str]]:
+    """
+    Detach or drop partitions whose whole month is older than the retention window.
+    Detached tables stay in the database as plain tables (e.g. for archiving).
+    """
+    if mode not in ("detach", "drop"):
+        raise ValueError("mode must be 'detach' or 'drop'")
+
+    cutoff = retention_cutoff(retention_months, now)
+    expired = []
+    for name in sorted(list_partitions(conn)):
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        if mode == "drop":
+            conn.execute(text(f"DROP TABLE {name}"))
+        expired.append((name, mode))
+    return expired
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions of the attempts table")
+    parser.add_argument("--ahead", type=int, default=settings.attempts_partitions_ahead,
+                        help="number of future months to pre-create")
+    parser.add_argument("--retention-months", type=int, default=settings.attempts_retention_months,
+                        help="months of attempts to keep, 0 keeps everything")
+    parser.add_argument("--mode", choices=("detach", "drop"), default=settings.attempts_retention_mode)
+    args = parser.parse_args(argv)
+
+    engine = get_engine()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("attempts partitioning is only supported on postgresql")
+
+    with engine.begin() as conn:
+        for name in ensure_future_partitions(conn, args.ahead):
+            print(f"created {name}")
+        if args.retention_months > 0:
+            for name, action in expire_partitions(conn, args.retention_months, args.mode):
+                print(f"{'dropped' if action == 'drop' else 'detached'} {name}")
+
+
+if __name__ == "__main__":
+    main()
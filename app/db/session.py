@@ -1,21 +1,68 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from typing import Callable, Optional
+from sqlalchemy import URL, create_engine, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import get_settings
 
-load_dotenv()
+# created on first use, so importing the app (e.g. gunicorn --preload)
+# never opens connections that forked workers would share
+_engine: Optional[Engine] = None
+
+
+def engine_url(database_url: str) -> URL:
+    """
+    DATABASE_URL with a plain postgresql:// pinned to psycopg 3, the driver in
+    requirements.txt (SQLAlchemy before 2.1 would look for psycopg2).
+    """
+    url = make_url(database_url)
+    if url.drivername == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+    return url
+
+
+def _connect_args(url: URL) -> dict:
+    if url.get_backend_name() == "postgresql" and url.get_driver_name() == "psycopg":
+        # psycopg prepares a statement server-side once it ran this many times on a
+        # connection; 0 turns it off (needed behind pgbouncer in transaction mode)
+        threshold = get_settings().database_prepare_threshold
+        return {"prepare_threshold": threshold or None}
+    return {}
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        database_url = get_settings().database_url
+        if not database_url:
+            raise RuntimeError("DATABASE_URL is not configured")
+        url = engine_url(database_url)
+        _engine = create_engine(url, connect_args=_connect_args(url))
+    return _engine
+
+
+def dispose_engine() -> None:
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(
     autobegin=True, 
-    autoflush=False, 
-    bind=engine)
+    autoflush=False)
 
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_session_factory() -> Callable[[], Session]:
+    """
+    For websockets and other long-lived endpoints: open a session only around
+    the work that needs one instead of holding a pooled connection for the
+    whole lifetime of the socket.
+    """
+    return lambda: SessionLocal(bind=get_engine())
@@ -0,0 +1,3 @@
+# jobs run as `python -m app.jobs.<name>` import no endpoint modules, so register
+# every model here before the first query configures the mappers
+import app.db.base  # noqa: F401
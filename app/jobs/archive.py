@@ -0,0 +1,108 @@
+"""
+Move old attempts out of the attempts table into the columnar archive.
+
+    python -m app.jobs.archive [--older-than-months 12] [--batch-size 5000]
+
+Months before the cutoff are processed oldest first. For every quiz with
+attempts in a month the rows are written to its segment, then the month's users
+file is updated, and only then are the rows deleted from the database in
+batches, with a commit after each. A crash at any point leaves every attempt
+readable from the database, the archive or both, and a re-run merges rows that
+were already archived instead of duplicating them.
+
+Recorded answers stay in attempt_answers for calibration; receipts and adaptive
+state of archived attempts are deleted with them. Archived attempts are not
+re-graded.
+"""
+import argparse
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.partitions import add_months, month_start, retention_cutoff
+from app.db.session import SessionLocal, get_engine
+from app.models.quiz import AdaptiveState, Attempt, SubmissionReceipt
+from app.services.archive import AttemptArchive, get_archive, month_label
+
+ARCHIVED_COLUMNS = (
+    Attempt.id, Attempt.user_id, Attempt.score, Attempt.quiz_version_id,
+    Attempt.created_at, Attempt.started_at, Attempt.completed_at,
+)
+
+
+def archive_month(db: Session, archive: AttemptArchive, month: date, batch_size: int = 5000) -> int:
+    """
+    Archive and delete every attempt created in one month, returns how many.
+    """
+    in_month = (Attempt.created_at >= month, Attempt.created_at < add_months(month, 1))
+    label = month_label(month)
+    quiz_ids = db.scalars(
+        select(Attempt.quiz_id).where(*in_month, Attempt.quiz_id.is_not(None)).distinct()
+    ).all()
+
+    moved: List[int] = []
+    users = []
+    for quiz_id in quiz_ids:
+        rows = db.execute(
+            select(*ARCHIVED_COLUMNS).where(Attempt.quiz_id == quiz_id, *in_month).order_by(Attempt.id)
+        ).mappings().all()
+        segment_users = archive.write_segment(quiz_id, label, rows)
+        segment_users = np.unique(segment_users[segment_users >= 0]).astype(np.int64)
+        users.append((segment_users << 32) | quiz_id)
+        moved += [row["id"] for row in rows]
+    if not moved:
+        return 0
+    archive.write_month_users(label, np.concatenate(users))
+
+    # only now that the files are in place
+    for start in range(0, len(moved), batch_size):
+        ids = moved[start:start + batch_size]
+        db.execute(delete(SubmissionReceipt).where(SubmissionReceipt.attempt_id.in_(ids)))
+        db.execute(delete(AdaptiveState).where(AdaptiveState.attempt_id.in_(ids)))
+        db.execute(
+            delete(Attempt).where(Attempt.id.in_(ids), *in_month).execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return len(moved)
+
+
+def archive_before(db: Session, archive: AttemptArchive, cutoff: date, batch_size: int = 5000) -> List[Tuple[str, int]]:
+    """
+    Archive all attempts created before cutoff (the first day of a month).
+    """
+    results = []
+    start = date.min
+    while True:
+        # next month that has attempts, gaps are skipped
+        oldest = db.scalar(
+            select(func.min(Attempt.created_at)).where(Attempt.created_at >= start, Attempt.created_at < cutoff)
+        )
+        if oldest is None:
+            return results
+        month = month_start(oldest)
+        results.append((month_label(month), archive_month(db, archive, month, batch_size)))
+        start = add_months(month, 1)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Move old attempts into the columnar archive")
+    parser.add_argument("--older-than-months", type=int, default=settings.archive_after_months)
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    args = parser.parse_args(argv)
+
+    archive = get_archive()
+    if archive is None:
+        raise SystemExit("ARCHIVE_DIR is not configured")
+
+    with SessionLocal(bind=get_engine()) as db:
+        for month, count in archive_before(db, archive, retention_cutoff(args.older_than_months), args.batch_size):
+            print(f"{month}: archived {count} attempts")
+
+
+if __name__ == "__main__":
+    main()
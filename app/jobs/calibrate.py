@@ -0,0 +1,73 @@
+"""
+Fit 2PL item parameters of adaptive quizzes from recorded answers.
+
+    python -m app.jobs.calibrate [--quiz-id 12] [--min-responses 200]
+
+Items with fewer responses than --min-responses keep their current parameters.
+Setting `calibrated_at` makes every worker rebuild its cached item pool.
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal, get_engine
+from app.models.quiz import AttemptAnswer, Question, Quiz
+from app.services.irt import fit_2pl
+
+
+def calibrate_quiz(db: Session, quiz_id: int, min_responses: int = 200) -> int:
+    """
+    Refit one quiz and return how many questions got new parameters.
+    """
+    rows = db.execute(
+        select(AttemptAnswer.attempt_id, AttemptAnswer.question_id, AttemptAnswer.is_correct)
+        .join(Question, Question.id == AttemptAnswer.question_id)
+        .where(Question.quiz_id == quiz_id)
+    ).all()
+    if not rows:
+        return 0
+
+    attempt_ids, question_ids, correct = (np.asarray(column) for column in zip(*rows))
+    _, person_idx = np.unique(attempt_ids, return_inverse=True)
+    items, item_idx = np.unique(question_ids, return_inverse=True)
+
+    a, b = fit_2pl(person_idx, item_idx, correct.astype(bool), len(items))
+    counts = np.bincount(item_idx, minlength=len(items))
+
+    values = [
+        {"id": int(items[i]), "discrimination": float(a[i]), "difficulty": float(b[i])}
+        for i in np.flatnonzero(counts >= min_responses)
+    ]
+    if values:
+        # executemany UPDATE by primary key
+        db.execute(update(Question), values)
+        db.execute(
+            update(Quiz).where(Quiz.id == quiz_id).values(calibrated_at=datetime.now(timezone.utc))
+        )
+    db.commit()
+    return len(values)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate item parameters of adaptive quizzes")
+    parser.add_argument("--quiz-id", type=int, help="only this quiz, default all adaptive quizzes")
+    parser.add_argument("--min-responses", type=int, default=200,
+                        help="answers an item needs before its parameters are refitted")
+    args = parser.parse_args(argv)
+
+    with SessionLocal(bind=get_engine()) as db:
+        if args.quiz_id:
+            quiz_ids = [args.quiz_id]
+        else:
+            quiz_ids = db.scalars(select(Quiz.id).where(Quiz.is_adaptive.is_(True))).all()
+        for quiz_id in quiz_ids:
+            updated = calibrate_quiz(db, quiz_id, args.min_responses)
+            print(f"quiz {quiz_id}: {updated} questions calibrated")
+
+
+if __name__ == "__main__":
+    main()
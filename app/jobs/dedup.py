@@ -0,0 +1,187 @@
+"""
+Near-duplicate questions across the whole bank.
+
+    python -m app.jobs.dedup index [--batch-size 1000] [--rebuild]
+    python -m app.jobs.dedup check quizzes.json [--threshold 0.8]
+    python -m app.jobs.dedup report [--threshold 0.8] [--min-size 2]
+
+`index` backfills MinHash signatures of questions that have none (questions
+created through the API are indexed as they are written). `check` flags the
+questions of a JSON file of quizzes (QuizCreate, or a list of them) before a
+bulk import and exits with status 1 when any were found. `report` lists
+clusters of near-duplicate questions.
+
+The report only reads buckets shared by more than one question. Inside a
+bucket every member is compared with the bucket's first member, so a bucket of
+n identical questions costs n comparisons instead of n^2; members are joined
+into clusters through the pairs that pass the threshold.
+"""
+import argparse
+import json
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal, get_engine
+from app.models.quiz import Question, QuestionBucket, QuestionSignature, Quiz
+from app.schemas.quiz import QuizCreate
+from app.services.dedup import find_duplicates, index_questions, load_signatures, similarity
+
+SIGNATURE_CHUNK = 10_000
+
+
+def backfill_index(db: Session, batch_size: int = 1000, rebuild: bool = False) -> int:
+    """
+    Index questions without a signature (all questions with rebuild), one
+    committed batch at a time in id order, so an interrupted run resumes.
+    """
+    indexed, last_id = 0, 0
+    while True:
+        query = select(Question.id, Question.text).where(Question.id > last_id)
+        if not rebuild:
+            query = query.outerjoin(QuestionSignature, QuestionSignature.question_id == Question.id).where(
+                QuestionSignature.question_id.is_(None)
+            )
+        batch = db.execute(query.order_by(Question.id).limit(batch_size)).all()
+        if not batch:
+            return indexed
+        indexed += index_questions(db, [(row.id, row.text) for row in batch])
+        db.commit()
+        last_id = batch[-1].id
+
+
+def _candidate_pairs(db: Session) -> List[tuple]:
+    live = (
+        select(QuestionBucket.bucket, QuestionBucket.question_id)
+        .join(Question, Question.id == QuestionBucket.question_id)
+        .join(Quiz, Quiz.id == Question.quiz_id)
+        .where(Quiz.deleted_at.is_(None))
+    )
+    live_rows = live.subquery()
+    shared = select(live_rows.c.bucket).group_by(live_rows.c.bucket).having(func.count() > 1)
+    rows = db.execute(
+        live.where(QuestionBucket.bucket.in_(shared)).order_by(QuestionBucket.bucket, QuestionBucket.question_id)
+    )
+    pairs = set()
+    for _, members in groupby(rows, key=itemgetter(0)):
+        hub, *others = [question_id for _, question_id in members]
+        pairs.update((hub, other) for other in others)
+    return sorted(pairs)
+
+
+def duplicate_clusters(db: Session, threshold: float, min_size: int = 2) -> List[List[int]]:
+    """
+    Question ids of every near-duplicate cluster, largest first.
+    """
+    pairs = _candidate_pairs(db)
+    if not pairs:
+        return []
+
+    question_ids = sorted({qid for pair in pairs for qid in pair})
+    position = {qid: i for i, qid in enumerate(question_ids)}
+    stored: Dict[int, np.ndarray] = {}
+    for start in range(0, len(question_ids), SIGNATURE_CHUNK):
+        chunk = question_ids[start:start + SIGNATURE_CHUNK]
+        stored.update((qid, signature) for qid, (_, signature) in load_signatures(db, chunk).items())
+    matrix = np.stack([stored[qid] for qid in question_ids])
+
+    left = np.array([position[a] for a, _ in pairs])
+    right = np.array([position[b] for _, b in pairs])
+    scores = similarity(matrix[left], matrix[right])
+
+    # union-find over the pairs that pass
+    parent = list(range(len(question_ids)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(left[scores >= threshold].tolist(), right[scores >= threshold].tolist()):
+        parent[root(a)] = root(b)
+
+    clusters: Dict[int, List[int]] = {}
+    for i, qid in enumerate(question_ids):
+        clusters.setdefault(root(i), []).append(qid)
+    return sorted((c for c in clusters.values() if len(c) >= min_size), key=lambda c: (-len(c), c[0]))
+
+
+def check_import(db: Session, quizzes: List[QuizCreate], threshold: float) -> List[dict]:
+    """
+    Flag questions of quizzes about to be imported, in file order.
+    """
+    located = [
+        (quiz_index, question_index, question.text)
+        for quiz_index, quiz in enumerate(quizzes)
+        for question_index, question in enumerate(quiz.questions)
+    ]
+    found = find_duplicates(db, [text for _, _, text in located], threshold)
+    for matches in found:
+        # batch matches point into the flattened list, report them by file position
+        for match in matches:
+            if "batch_index" in match:
+                match["quiz"], match["question"], _ = located[match.pop("batch_index")]
+    return [
+        {"quiz": quiz_index, "question": question_index, "text": text, "matches": matches}
+        for (quiz_index, question_index, text), matches in zip(located, found) if matches
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="backfill signatures")
+    index.add_argument("--batch-size", type=int, default=1000)
+    index.add_argument("--rebuild", action="store_true", help="re-index every question")
+
+    check = commands.add_parser("check", help="flag duplicates in a file before importing it")
+    check.add_argument("path")
+    check.add_argument("--threshold", type=float, default=settings.dedup_threshold)
+
+    report = commands.add_parser("report", help="clusters of near-duplicates in the bank")
+    report.add_argument("--threshold", type=float, default=settings.dedup_threshold)
+    report.add_argument("--min-size", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    with SessionLocal(bind=get_engine()) as db:
+        if args.command == "index":
+            print(f"indexed {backfill_index(db, args.batch_size, args.rebuild)} questions")
+
+        elif args.command == "check":
+            with open(args.path) as f:
+                data = json.load(f)
+            quizzes = [QuizCreate.model_validate(q) for q in (data if isinstance(data, list) else [data])]
+            flagged = check_import(db, quizzes, args.threshold)
+            for item in flagged:
+                print(f"quiz {item['quiz']} question {item['question']}: {item['text'][:80]!r}")
+                for match in item["matches"]:
+                    if "question_id" in match:
+                        where = f"question {match['question_id']} (quiz {match['quiz_id']})"
+                    else:
+                        where = f"quiz {match['quiz']} question {match['question']} of this file"
+                    print(f"    {match['similarity']:.2f}  {where}")
+            if flagged:
+                raise SystemExit(1)
+
+        else:
+            clusters = duplicate_clusters(db, args.threshold, args.min_size)
+            for cluster in clusters:
+                quiz_of = dict(db.execute(
+                    select(Question.id, Question.quiz_id).where(Question.id.in_(cluster))
+                ).all())
+                first = db.scalar(select(Question.text).where(Question.id == cluster[0]))
+                print(f"{len(cluster)} questions like {first[:80]!r}")
+                print("    " + ", ".join(f"{qid} (quiz {quiz_of[qid]})" for qid in cluster))
+            print(f"{len(clusters)} clusters, {sum(len(c) for c in clusters)} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Remove soft-deleted quizzes and everything that hangs off them.
+
+    python -m app.jobs.purge [--batch-size 1000] [--older-than-minutes 0]
+
+Children are deleted in bounded, set-based batches with a commit after each,
+so no statement touches more than --batch-size rows and locks are held
+briefly. ON DELETE CASCADE on the foreign keys is only the safety net for
+whatever is left when the quiz row itself goes.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal, get_engine
+from app.services.archive import get_archive
+from app.models.quiz import (
+    AdaptiveState, Attempt, AttemptAnswer, AttemptSummary, Choice, Question, QuestionBucket, QuestionSignature, Quiz,
+    QuizVersion, RegradeJob, SubmissionReceipt
+)
+
+
+def _delete_in_batches(db: Session, model, key, ids_query, batch_size: int, *scope) -> int:
+    # scope narrows the DELETE further when key alone is not unique
+    deleted = 0
+    while True:
+        batch = ids_query.limit(batch_size).scalar_subquery()
+        result = db.execute(
+            delete(model).where(key.in_(batch), *scope).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def purge_quiz(db: Session, quiz_id: int, batch_size: int = 1000, older_than: Optional[datetime] = None) -> int:
+    """
+    Purge one soft-deleted quiz, returns the number of rows removed.
+    Quizzes that are live, or were deleted after older_than, are left alone.
+    Safe to run concurrently with itself and to resume after a crash.
+    """
+    deleted = select(Quiz.id).where(Quiz.id == quiz_id, Quiz.deleted_at.is_not(None))
+    if older_than:
+        deleted = deleted.where(Quiz.deleted_at < older_than)
+    if db.scalar(deleted) is None:
+        return 0
+
+    question_ids = select(Question.id).where(Question.quiz_id == quiz_id)
+    attempt_ids = select(Attempt.id).where(Attempt.quiz_id == quiz_id)
+
+    # leaves first, so every statement deletes rows nobody references any more
+    steps = [
+        (Choice, Choice.id, select(Choice.id).where(Choice.question_id.in_(question_ids))),
+        (AttemptAnswer, AttemptAnswer.id, select(AttemptAnswer.id).where(AttemptAnswer.question_id.in_(question_ids))),
+        (QuestionBucket, QuestionBucket.bucket,
+         select(QuestionBucket.bucket).where(QuestionBucket.question_id.in_(question_ids)),
+         QuestionBucket.question_id.in_(question_ids)),
+        (QuestionSignature, QuestionSignature.question_id,
+         select(QuestionSignature.question_id).where(QuestionSignature.question_id.in_(question_ids))),
+        (Question, Question.id, question_ids),
+        (AdaptiveState, AdaptiveState.attempt_id,
+         select(AdaptiveState.attempt_id).where(AdaptiveState.attempt_id.in_(attempt_ids))),
+        (SubmissionReceipt, SubmissionReceipt.id,
+         select(SubmissionReceipt.id).where(SubmissionReceipt.attempt_id.in_(attempt_ids))),
+        (Attempt, Attempt.id, attempt_ids),
+        (AttemptSummary, AttemptSummary.user_id,
+         select(AttemptSummary.user_id).where(AttemptSummary.quiz_id == quiz_id),
+         AttemptSummary.quiz_id == quiz_id),
+        (RegradeJob, RegradeJob.id, select(RegradeJob.id).where(RegradeJob.quiz_id == quiz_id)),
+        (QuizVersion, QuizVersion.id, select(QuizVersion.id).where(QuizVersion.quiz_id == quiz_id)),
+    ]
+    removed = sum(
+        _delete_in_batches(db, model, key, ids_query, batch_size, *scope)
+        for model, key, ids_query, *scope in steps
+    )
+
+    result = db.execute(delete(Quiz).where(Quiz.id == quiz_id, Quiz.deleted_at.is_not(None)))
+    db.commit()
+    archive = get_archive()
+    if archive and db.scalar(select(Quiz.id).where(Quiz.id == quiz_id)) is None:
+        archive.remove_quiz(quiz_id)
+    return removed + result.rowcount
+
+
+def purge_in_background(quiz_id: int) -> None:
+    # runs after the DELETE response was sent, with its own session
+    with SessionLocal(bind=get_engine()) as db:
+        purge_quiz(db, quiz_id, get_settings().purge_batch_size)
+
+
+def purge_deleted_quizzes(db: Session, batch_size: int = 1000, older_than: Optional[datetime] = None) -> List[int]:
+    query = select(Quiz.id).where(Quiz.deleted_at.is_not(None))
+    if older_than:
+        query = query.where(Quiz.deleted_at < older_than)
+    quiz_ids = db.scalars(query.order_by(Quiz.deleted_at)).all()
+    for quiz_id in quiz_ids:
+        purge_quiz(db, quiz_id, batch_size, older_than)
+    return quiz_ids
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Purge soft-deleted quizzes")
+    parser.add_argument("--batch-size", type=int, default=settings.purge_batch_size)
+    parser.add_argument("--older-than-minutes", type=int, default=0,
+                        help="only quizzes deleted at least this long ago")
+    args = parser.parse_args(argv)
+
+    older_than = None
+    if args.older_than_minutes:
+        older_than = datetime.now(timezone.utc) - timedelta(minutes=args.older_than_minutes)
+
+    with SessionLocal(bind=get_engine()) as db:
+        for quiz_id in purge_deleted_quizzes(db, args.batch_size, older_than):
+            print(f"purged quiz {quiz_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Re-score a quiz's attempts against the answer key of one of its versions.
+
+    python -m app.jobs.regrade --quiz-id 12 [--version-id <sha256>] [--chunk-size 5000]
+    python -m app.jobs.regrade --job-id 7      # resume an interrupted job
+    python -m app.jobs.regrade --resume-stale [--stale-minutes 15]   # from cron
+
+Attempts are walked in id order, one chunk per transaction. A chunk is one
+query for its recorded answers, one vectorized NumPy pass that marks them
+against the key and sums correct answers per attempt, and one executemany
+UPDATE of the scores that changed. Attempts without recorded answers (live
+sessions, time-ups, submissions from before answers were stored) keep their score.
+
+A quiz has at most one pending or running job. Jobs started by the API run in
+the process that served the request; one cut off by a restart stops touching
+updated_at, and --resume-stale (run periodically) claims and finishes it.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal, get_engine
+from app.models.quiz import Attempt, AttemptAnswer, Quiz, RegradeJob
+from app.services.attempts import rebuild_summaries
+from app.services.versions import current_version_id, get_answer_key
+
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+class RegradeConflict(RuntimeError):
+    pass
+
+
+def _pairs(question_ids: np.ndarray, choice_ids: np.ndarray) -> np.ndarray:
+    # (question, choice) packed into one int64 so membership is a single np.isin
+    return (question_ids.astype(np.int64) << 32) | choice_ids.astype(np.int64)
+
+
+def key_pairs(answer_key: Dict[int, Set[int]]) -> np.ndarray:
+    questions = [qid for qid, choices in answer_key.items() for _ in choices]
+    choices = [cid for cids in answer_key.values() for cid in cids]
+    return np.sort(_pairs(np.array(questions, dtype=np.int64), np.array(choices, dtype=np.int64)))
+
+
+def active_regrade_job(db: Session, quiz_id: int) -> Optional[RegradeJob]:
+    return db.scalars(
+        select(RegradeJob).where(RegradeJob.quiz_id == quiz_id, RegradeJob.status.in_(ACTIVE_STATUSES))
+    ).first()
+
+
+def create_regrade_job(db: Session, quiz_id: int, version_id: str) -> RegradeJob:
+    """
+    Raises RegradeConflict while another job of the quiz is pending or running.
+    """
+    active = active_regrade_job(db, quiz_id)
+    if active is not None:
+        raise RegradeConflict(f"regrade job {active.id} of quiz {quiz_id} is still {active.status}")
+    total = db.scalar(
+        select(func.count()).select_from(Attempt)
+        .where(Attempt.quiz_id == quiz_id, Attempt.completed_at.is_not(None))
+    )
+    job = RegradeJob(quiz_id=quiz_id, version_id=version_id, total=total, status="pending")
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # uq_regrade_jobs_active_quiz, a concurrent request created one first
+        db.rollback()
+        raise RegradeConflict(f"a regrade job of quiz {quiz_id} is already pending")
+    db.refresh(job)
+    return job
+
+
+def regrade_chunk(db: Session, job: RegradeJob, correct_pairs: np.ndarray, question_count: int, chunk_size: int) -> bool:
+    """
+    Re-score the next chunk and advance the job in one transaction.
+    Returns False when no attempts are left.
+    """
+    chunk = db.execute(
+        select(Attempt.id, Attempt.score, Attempt.quiz_version_id)
+        .where(
+            Attempt.quiz_id == job.quiz_id,
+            Attempt.completed_at.is_not(None),
+            Attempt.id > job.last_attempt_id
+        )
+        .order_by(Attempt.id)
+        .limit(chunk_size)
+    ).all()
+    if not chunk:
+        return False
+
+    attempt_ids = np.array([row.id for row in chunk], dtype=np.int64)
+    old_scores = np.array([row.score or 0.0 for row in chunk], dtype=np.float64)
+    same_version = np.array([row.quiz_version_id == job.version_id for row in chunk])
+
+    answers = db.execute(
+        select(AttemptAnswer.id, AttemptAnswer.attempt_id, AttemptAnswer.question_id,
+               AttemptAnswer.choice_id, AttemptAnswer.is_correct)
+        .where(AttemptAnswer.attempt_id.in_(attempt_ids.tolist()))
+    ).all()
+
+    score_rows, answer_rows = [], []
+    changed = 0
+    if answers:
+        answer_ids, answer_attempts, questions, choices, stored = (
+            np.array([-1 if v is None else v for v in column], dtype=np.int64) for column in zip(*answers)
+        )
+        correct = np.isin(_pairs(questions, choices), correct_pairs) & (choices >= 0)
+
+        position = np.searchsorted(attempt_ids, answer_attempts)
+        answered = np.bincount(position, minlength=len(attempt_ids)) > 0
+        new_scores = np.bincount(position, weights=correct, minlength=len(attempt_ids)) / question_count * 100
+
+        score_changed = answered & ~np.isclose(new_scores, old_scores)
+        changed = int(score_changed.sum())
+        dirty = np.flatnonzero(score_changed | (answered & ~same_version))
+        score_rows = [
+            {"id": int(attempt_ids[i]), "score": float(new_scores[i]), "quiz_version_id": job.version_id}
+            for i in dirty
+        ]
+        flipped = np.flatnonzero(correct != stored.astype(bool))
+        answer_rows = [{"id": int(answer_ids[i]), "is_correct": bool(correct[i])} for i in flipped]
+
+    if score_rows:
+        db.execute(update(Attempt), score_rows)
+    if answer_rows:
+        db.execute(update(AttemptAnswer), answer_rows)
+
+    # conditional on the previous position, a second worker on the same job stops here
+    result = db.execute(
+        update(RegradeJob)
+        .where(RegradeJob.id == job.id, RegradeJob.last_attempt_id == job.last_attempt_id)
+        .values(
+            last_attempt_id=int(attempt_ids[-1]),
+            processed=RegradeJob.processed + len(chunk),
+            changed=RegradeJob.changed + changed,
+            updated_at=func.now()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise RegradeConflict(f"regrade job {job.id} was advanced by another worker")
+    db.commit()
+    db.refresh(job)
+    return True
+
+
+def run_regrade_job(
+    db: Session,
+    job_id: int,
+    chunk_size: int = 5000,
+    progress: Optional[Callable[[RegradeJob], None]] = None
+) -> RegradeJob:
+    job = db.get(RegradeJob, job_id)
+    if job is None or job.status == "finished":
+        return job
+
+    answer_key = get_answer_key(db, job.version_id)
+    if not answer_key:
+        job.status, job.error = "failed", "Version has no questions"
+        db.commit()
+        return job
+
+    job.status, job.error, job.updated_at = "running", None, func.now()
+    db.commit()
+    correct_pairs = key_pairs(answer_key)
+    try:
+        while regrade_chunk(db, job, correct_pairs, len(answer_key), chunk_size):
+            if progress:
+                progress(job)
+    except RegradeConflict:
+        # the other worker finishes the job
+        db.refresh(job)
+        return job
+    except Exception as e:
+        db.rollback()
+        job.status, job.error = "failed", str(e)[:500]
+        db.commit()
+        raise
+
+    # best/average scores changed with the attempts, refresh them in the same commit
+    rebuild_summaries(db, job.quiz_id)
+    job.status = "finished"
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    return job
+
+
+def resume_stale_jobs(
+    db: Session,
+    stale_after: timedelta,
+    chunk_size: int = 5000,
+    progress: Optional[Callable[[RegradeJob], None]] = None
+) -> List[RegradeJob]:
+    """
+    Finish pending or running jobs that made no progress for stale_after, e.g.
+    because the API process running them was restarted.
+    """
+    cutoff = datetime.now(timezone.utc) - stale_after
+    stale = (
+        RegradeJob.status.in_(ACTIVE_STATUSES),
+        (RegradeJob.updated_at < cutoff) | RegradeJob.updated_at.is_(None)
+    )
+    finished = []
+    for job_id in db.scalars(select(RegradeJob.id).where(*stale).order_by(RegradeJob.id)).all():
+        # claim it, a second cron run sees it as fresh and moves on
+        claimed = db.execute(
+            update(RegradeJob).where(RegradeJob.id == job_id, *stale).values(updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if claimed.rowcount == 1:
+            finished.append(run_regrade_job(db, job_id, chunk_size, progress))
+    return finished
+
+
+def regrade_in_background(job_id: int) -> None:
+    # runs after the response was sent, with its own session
+    with SessionLocal(bind=get_engine()) as db:
+        run_regrade_job(db, job_id, get_settings().regrade_chunk_size)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-score attempts of a quiz against a version's answer key")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--quiz-id", type=int, help="start a new job for this quiz")
+    target.add_argument("--job-id", type=int, help="resume an existing job")
+    target.add_argument("--resume-stale", action="store_true", help="finish active jobs that stopped making progress")
+    parser.add_argument("--stale-minutes", type=int, default=get_settings().regrade_stale_minutes)
+    parser.add_argument("--version-id", help="answer key to grade against, default the current version")
+    parser.add_argument("--chunk-size", type=int, default=get_settings().regrade_chunk_size)
+    args = parser.parse_args(argv)
+
+    def report(job: RegradeJob) -> None:
+        print(f"job {job.id}: {job.processed}/{job.total} attempts, {job.changed} scores changed")
+
+    with SessionLocal(bind=get_engine()) as db:
+        if args.resume_stale:
+            jobs = resume_stale_jobs(db, timedelta(minutes=args.stale_minutes), args.chunk_size, report)
+            for job in jobs:
+                print(f"job {job.id}: {job.status}")
+            print(f"{len(jobs)} stale jobs resumed")
+            return
+
+        if args.quiz_id:
+            quiz = db.get(Quiz, args.quiz_id)
+            if quiz is None:
+                raise SystemExit(f"quiz {args.quiz_id} not found")
+            try:
+                job = create_regrade_job(db, quiz.id, args.version_id or current_version_id(db, quiz))
+            except RegradeConflict as e:
+                raise SystemExit(str(e))
+        else:
+            job = db.get(RegradeJob, args.job_id)
+            if job is None:
+                raise SystemExit(f"regrade job {args.job_id} not found")
+
+        job = run_regrade_job(db, job.id, args.chunk_size, report)
+        print(f"job {job.id}: {job.status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,59 @@
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
-from app.api.endpoints import users, quizzes, auth, categories
+from app.core.cache import quiz_payloads
+from app.core.compression import CompressionMiddleware
+from app.core.config import Settings, get_settings, set_settings
+from app.db.session import dispose_engine
+from app.api.endpoints import users, quizzes, adaptive, auth, categories, live
 
-app = FastAPI(title="Quiz Engine")
 
-app.include_router(auth.router, prefix="/auth", tags=["auth"])
-app.include_router(users.router, prefix="/users", tags=["users"])
-app.include_router(quizzes.router, prefix="/quizzes", tags=["quizzes"])
-app.include_router(categories.router, prefix="/categories", tags=["categories"])
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # engine and password hasher are created lazily on first use in each worker
+    yield
+    dispose_engine()
+
 
-@app.get("/")
 def root():
-    return {"message": "Quiz Engine API is running"}
\ No newline at end of file
+    return {"message": "Quiz Engine API is running"}
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the application.
+    uvicorn --factory app.main:create_app, gunicorn "app.main:create_app()"
+    """
+    if settings is not None:
+        set_settings(settings)
+
+    settings = get_settings()
+    app = FastAPI(title="Quiz Engine", lifespan=lifespan)
+    app.state.settings = settings
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
+    quiz_payloads.max_entries = settings.quiz_cache_max_entries
+
+    app.include_router(auth.router, prefix="/auth", tags=["auth"])
+    app.include_router(users.router, prefix="/users", tags=["users"])
+    app.include_router(quizzes.router, prefix="/quizzes", tags=["quizzes"])
+    app.include_router(adaptive.router, prefix="/quizzes", tags=["adaptive"])
+    app.include_router(categories.router, prefix="/categories", tags=["categories"])
+    if settings.live_enabled:
+        app.include_router(live.router, prefix="/live", tags=["live"])
+
+    app.get("/")(root)
+    return app
+
+
+_app: Optional[FastAPI] = None
+
+
+def __getattr__(name: str):
+    # keeps `uvicorn app.main:app` working without building the app at import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Float, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Boolean, Float, DateTime, JSON, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.db.base_class import Base
 
 
@@ -24,21 +24,83 @@ class Quiz(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     time_limit = Column(Integer, nullable=True)  
 
+    # adaptive quizzes pick questions from the pool one at a time (IRT 2PL)
+    is_adaptive = Column(Boolean, default=False, nullable=False)
+    calibrated_at = Column(DateTime(timezone=True), nullable=True)
+
+    # current QuizVersion, no FK since versions reference their quiz
+    version_id = Column(String(64), nullable=True)
+
+    # soft delete hides the quiz at once, app/jobs/purge.py removes it later
+    deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
 
     creator = relationship("User", back_populates="quizzes")
-    questions = relationship("Question", back_populates="quiz", cascade="all, delete-orphan")
+    # children are removed by ON DELETE CASCADE, not loaded and deleted one by one;
+    # questions retired by a content patch stay in the table but not in the quiz
+    questions = relationship(
+        "Question",
+        primaryjoin="and_(Quiz.id == Question.quiz_id, Question.removed_at.is_(None))",
+        back_populates="quiz", cascade="all, delete-orphan", passive_deletes=True
+    )
+    versions = relationship("QuizVersion", back_populates="quiz", cascade="all, delete-orphan", passive_deletes=True)
 
     category = relationship("Category", back_populates="quizzes")
 
 
+class QuizVersion(Base):
+    """
+    Immutable snapshot of a quiz as rendered by QuizResponse.
+    The id is the sha256 of the canonical JSON content, see app/services/versions.py.
+    """
+    __tablename__ = "quiz_versions"
+
+    id = Column(String(64), primary_key=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    content = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    quiz = relationship("Quiz", back_populates="versions")
+
+
 class Question(Base):
     __tablename__="questions"
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String, nullable=False)
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"))
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), index=True)
+
+    # 2PL item parameters, fitted by app/jobs/calibrate.py
+    discrimination = Column(Float, default=1.0, nullable=False)
+    difficulty = Column(Float, default=0.0, nullable=False)
+
+    # set by PATCH /quizzes/{id}/content instead of deleting, recorded answers reference the question
+    removed_at = Column(DateTime(timezone=True), nullable=True)
 
     quiz = relationship("Quiz", back_populates="questions")
-    choices = relationship("Choice", back_populates="question", cascade="all, delete-orphan")
+    choices = relationship("Choice", back_populates="question", cascade="all, delete-orphan", passive_deletes=True)
+
+
+class QuestionSignature(Base):
+    """
+    MinHash signature of a question's normalized text, see app/services/dedup.py.
+    """
+    __tablename__ = "question_signatures"
+
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    # uint32 minimum hashes, one per permutation
+    signature = Column(LargeBinary, nullable=False)
+
+
+class QuestionBucket(Base):
+    """
+    LSH band buckets of question signatures. Questions sharing any bucket are
+    near-duplicate candidates, found with one indexed lookup per band.
+    """
+    __tablename__ = "question_lsh_buckets"
+
+    bucket = Column(BigInteger, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True, index=True)
 
 
 class Choice(Base):
@@ -46,25 +108,129 @@ class Choice(Base):
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String, nullable=False)
     is_correct = Column(Boolean, default=False)
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), index=True)
 
     question = relationship("Question", back_populates="choices")
 
 
 class Attempt(Base):
     __tablename__ = "attempts"
+    # in postgres the table is range partitioned by month on created_at and the
+    # real primary key is (id, created_at), see app/db/partitions.py
+    __table_args__ = (
+        Index("ix_attempts_user_id_created_at", "user_id", "created_at"),
+        Index("ix_attempts_quiz_id_score", "quiz_id", "score"),
+        # keyset walk over one quiz's attempts, see app/jobs/regrade.py
+        Index("ix_attempts_quiz_id_id", "quiz_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    quiz_id = Column(Integer, ForeignKey("quizzes.id"))
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"))
+    # version the attempt started on, scoring uses its answer key
+    quiz_version_id = Column(String(64), nullable=True)
     score = Column(Float)  # Процент правильных ответов
 
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     started_at = Column(DateTime(timezone=True), server_default=func.now())
-    completed_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # set once by finish_attempt, other updates (re-grades, backfills) must not move it
+    completed_at = Column(DateTime(timezone=True))
 
 
     # connections for easy access
     user = relationship("User")
-    quiz = relationship("Quiz")
\ No newline at end of file
+    quiz = relationship("Quiz")
+
+
+class AttemptSummary(Base):
+    """
+    Per (user, quiz) aggregates of finished attempts, maintained incrementally
+    by app/services/attempts.py so "my progress" never scans attempt history.
+    """
+    __tablename__ = "attempt_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True, index=True)
+    attempt_count = Column(Integer, nullable=False, default=0)
+    best_score = Column(Float, nullable=False, default=0.0)
+    last_score = Column(Float, nullable=False, default=0.0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    last_attempt_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SubmissionReceipt(Base):
+    __tablename__ = "submission_receipts"
+    # one stored response per (user, attempt, key) so retries replay it
+    __table_args__ = (
+        UniqueConstraint("user_id", "attempt_id", "idempotency_key", name="uq_submission_receipts_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # no FK, a partitioned attempts table has no unique index on id alone;
+    # indexed for the purge and archive jobs, which delete receipts by attempt
+    attempt_id = Column(Integer, nullable=False, index=True)
+    idempotency_key = Column(String(255), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AttemptAnswer(Base):
+    __tablename__ = "attempt_answers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # no FK, a partitioned attempts table has no unique index on id alone
+    attempt_id = Column(Integer, nullable=False, index=True)
+    # no cascade, answers outlive a removed question (re-grades, calibration); purge deletes them first
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    choice_id = Column(Integer, nullable=True)
+    is_correct = Column(Boolean, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AdaptiveState(Base):
+    __tablename__ = "adaptive_states"
+
+    attempt_id = Column(Integer, primary_key=True)
+    # float64 log-posterior over app.services.irt.THETA_GRID
+    log_posterior = Column(LargeBinary, nullable=False)
+    ability = Column(Float, nullable=False, default=0.0)
+    ability_se = Column(Float, nullable=False, default=1.0)
+    items_administered = Column(Integer, nullable=False, default=0)
+    current_question_id = Column(Integer, nullable=True)
+
+
+class RegradeJob(Base):
+    """
+    Progress of re-scoring one quiz's attempts against a version's answer key.
+    last_attempt_id advances in the same transaction as each chunk, so a job
+    resumes exactly where it stopped. updated_at moves with it; an active job
+    that stopped moving was cut off and is picked up by the periodic job.
+    """
+    __tablename__ = "regrade_jobs"
+    # one active job per quiz, two keys rewriting the same scores would race
+    __table_args__ = (
+        Index(
+            "uq_regrade_jobs_active_quiz", "quiz_id", unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+            sqlite_where=text("status IN ('pending', 'running')")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    version_id = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, default="pending")  # pending, running, finished, failed
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)
+    last_attempt_id = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, ConfigDict, Field
+
+class LiveSessionCreate(BaseModel):
+    quiz_id: int
+    question_seconds: float = Field(20, gt=0, le=600)
+    reveal_seconds: float = Field(5, ge=0, le=60)
+
+class LiveSessionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    code: str
+    quiz_id: int
+    host_id: int
+    state: str
+    question_seconds: float
+    reveal_seconds: float
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import List, Optional
 
@@ -28,12 +28,33 @@ class QuizCreate(BaseModel):
     description: Optional[str] = None
     category_id: Optional[int] = None
     time_limit: Optional[int] = None  # in seconds
+    is_adaptive: bool = False
     questions: List[QuestionCreate]
 
 class QuizUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
 
+# content diff, questions and choices are addressed by id
+class ChoicePatch(BaseModel):
+    id: int
+    text: Optional[str] = None
+    is_correct: Optional[bool] = None
+
+class QuestionPatch(BaseModel):
+    id: int
+    text: Optional[str] = None
+    add_choices: List[ChoiceCreate] = []
+    update_choices: List[ChoicePatch] = []
+    remove_choices: List[int] = []
+
+class QuizContentPatch(BaseModel):
+    # optional optimistic check against the version the editor started from
+    base_version_id: Optional[str] = None
+    add_questions: List[QuestionCreate] = []
+    update_questions: List[QuestionPatch] = []
+    remove_questions: List[int] = []
+
 class QuizResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: int
@@ -42,6 +63,8 @@ class QuizResponse(BaseModel):
     creator_id: int
     category_id: Optional[int]
     time_limit: Optional[int]
+    is_adaptive: bool = False
+    version_id: Optional[str] = None
     questions: List[QuestionResponse]
 
 # answer item
@@ -53,6 +76,30 @@ class AnswerItem(BaseModel):
 class QuizSubmission(BaseModel):
     answers: List[AnswerItem]
 
+# adaptive mode, questions are sent without the answer key
+class AdaptiveChoice(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    text: str
+
+class AdaptiveQuestion(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    text: str
+    choices: List[AdaptiveChoice]
+
+class NextQuestionRequest(BaseModel):
+    answer: Optional[AnswerItem] = None
+
+class AdaptiveStep(BaseModel):
+    attempt_id: int
+    ability: float
+    ability_se: float
+    items_administered: int
+    finished: bool
+    score: Optional[float] = None
+    question: Optional[AdaptiveQuestion] = None
+
 # attempt response
 class AttemptResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -60,10 +107,61 @@ class AttemptResponse(BaseModel):
     quiz_id: int
     user_id: int
     score: float
+    quiz_version_id: Optional[str] = None
     created_at: datetime 
     started_at: datetime
     completed_at: Optional[datetime] = None
 
+class AttemptSummaryResponse(BaseModel):
+    quiz_id: int
+    quiz_title: str
+    attempt_count: int
+    best_score: float
+    last_score: float
+    average_score: float
+    last_attempt_at: Optional[datetime] = None
+
+class QuizMonthStats(BaseModel):
+    month: str  # YYYY-MM
+    attempts: int
+    completed: int
+    average_score: Optional[float] = None
+    best_score: Optional[float] = None
+
+class RegradeRequest(BaseModel):
+    # defaults to the current version of the quiz
+    version_id: Optional[str] = None
+
+class RegradeJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    quiz_id: int
+    version_id: str
+    status: str
+    total: int
+    processed: int
+    changed: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+# near-duplicate check before an import
+class DuplicateCheckRequest(BaseModel):
+    questions: List[str]
+    threshold: Optional[float] = Field(None, gt=0, le=1)
+
+class DuplicateMatch(BaseModel):
+    # a question in the bank, or an earlier entry of the same request
+    question_id: Optional[int] = None
+    quiz_id: Optional[int] = None
+    batch_index: Optional[int] = None
+    similarity: float
+
+class DuplicateReport(BaseModel):
+    index: int
+    text: str
+    matches: List[DuplicateMatch]
+
 # category schemas
 class CategoryBase(BaseModel):
     name: str
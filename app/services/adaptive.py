@@ -0,0 +1,50 @@
+"""
+Adaptive attempts on top of app/services/irt.py.
+
+Item pools are cached per worker and keyed by the quiz's version and
+`calibrated_at`, so content edits and calibration runs are picked up by every
+worker on its next request.
+"""
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.models.quiz import AttemptAnswer, AdaptiveState, Question, Quiz
+from app.services import irt
+
+item_pools = LRUCache(max_entries=256, ttl_seconds=0)
+
+
+def get_item_pool(db: Session, quiz: Quiz) -> irt.ItemPool:
+    key = (quiz.id, quiz.version_id, quiz.calibrated_at)
+    pool = item_pools.get(key)
+    if pool is None:
+        rows = db.query(Question.id, Question.discrimination, Question.difficulty).filter(
+            Question.quiz_id == quiz.id, Question.removed_at.is_(None)
+        ).order_by(Question.id).all()
+        pool = item_pools.put(key, irt.ItemPool(
+            [r.id for r in rows], [r.discrimination for r in rows], [r.difficulty for r in rows]
+        ))
+    return pool
+
+
+def load_posterior(state: AdaptiveState) -> np.ndarray:
+    return np.frombuffer(state.log_posterior, dtype=np.float64).copy()
+
+
+def dump_posterior(log_posterior: np.ndarray) -> bytes:
+    return log_posterior.astype(np.float64).tobytes()
+
+
+def administered_ids(db: Session, attempt_id: int) -> List[int]:
+    return [
+        question_id for (question_id,) in
+        db.query(AttemptAnswer.question_id).filter(AttemptAnswer.attempt_id == attempt_id)
+    ]
+
+
+def should_stop(items_administered: int, se: float, next_question_id: Optional[int],
+                max_items: int, target_se: float) -> bool:
+    return items_administered >= max_items or se <= target_se or next_question_id is None
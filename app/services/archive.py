@@ -0,0 +1,410 @@
+"""
+Columnar cold storage for old attempts.
+
+    <ARCHIVE_DIR>/quiz=<quiz_id>/<YYYY-MM>.<generation>/<column>.npy
+    <ARCHIVE_DIR>/users/<YYYY-MM>.<generation>.npy
+
+app/jobs/archive.py moves attempts older than a cutoff out of the attempts table,
+one segment per quiz and month. Every column is a plain .npy file opened with
+mmap_mode="r", so a read only faults in the pages it touches and the page cache
+is shared by all workers. Rows of a segment are sorted by (user_id, created_at, id),
+which makes one user's attempts a slice found by binary search, and a page of
+them another binary search on (created_at, id) inside it. The users file of a
+month holds the sorted (user_id, quiz_id) pairs archived in it, so a user's
+history opens only the segments that contain it, newest month first.
+
+Files are never changed in place: a rewrite goes to the next generation and the
+previous one is removed afterwards, so readers always see a complete segment.
+Columns are not compressed, a compressed .npz cannot be memory-mapped; instead
+dtypes are narrow and version ids are dictionary encoded.
+"""
+import os
+import re
+import shutil
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+
+COLUMNS = {
+    "id": np.int64,
+    "user_id": np.int32,
+    "score": np.float64,
+    "version": np.int32,  # index into versions.npy, -1 for none
+    "created_at": "datetime64[us]",
+    "started_at": "datetime64[us]",
+    "completed_at": "datetime64[us]",
+}
+_GENERATION = re.compile(r"^(\d{4}-\d{2})\.(\d+)(?:\.npy)?$")
+
+
+def month_label(month: date) -> str:
+    return f"{month.year:04d}-{month.month:02d}"
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # numpy datetime64 has no time zone, archived times are UTC
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _to_datetime(value: np.datetime64) -> Optional[datetime]:
+    if np.isnat(value):
+        return None
+    return value.astype(datetime).replace(tzinfo=timezone.utc)
+
+
+def _latest(directory: str) -> Dict[str, Tuple[int, str]]:
+    # month -> (generation, entry name) of the newest generation per month
+    latest: Dict[str, Tuple[int, str]] = {}
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return latest
+    for name in names:
+        match = _GENERATION.match(name)
+        if match:
+            month, generation = match.group(1), int(match.group(2))
+            if generation > latest.get(month, (-1, ""))[0]:
+                latest[month] = (generation, name)
+    return latest
+
+
+def _remove_older(directory: str, month: str, keep: int) -> None:
+    for name in os.listdir(directory):
+        match = _GENERATION.match(name)
+        if match and match.group(1) == month and int(match.group(2)) < keep:
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+class Segment:
+    """
+    One quiz's archived attempts of one month, columns memory-mapped.
+    """
+
+    def __init__(self, path: str, quiz_id: int, month: str):
+        self.quiz_id = quiz_id
+        self.month = month
+        # plain ndarray views of the maps, np.memmap slicing has noticeable per-call overhead
+        self.columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r").view(np.ndarray) for name in COLUMNS
+        }
+        self.versions = np.load(os.path.join(path, "versions.npy"))
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def user_rows(self, user_id: int) -> slice:
+        users = self.columns["user_id"]
+        return slice(int(np.searchsorted(users, user_id, "left")), int(np.searchsorted(users, user_id, "right")))
+
+    def user_page(self, user_id: int, limit: int, since=None, before=None) -> slice:
+        """
+        The user's newest `limit` rows with since <= created_at and (created_at, id) < before,
+        since and before given as datetime64[us] / (datetime64[us], id).
+        """
+        rows = self.user_rows(user_id)
+        created = self.columns["created_at"][rows]
+        start, end = 0, len(created)
+        if since is not None:
+            start = int(np.searchsorted(created, since, "left"))
+        if before is not None:
+            # ids are sorted within equal created_at
+            left, right = np.searchsorted(created, before[0], "left"), np.searchsorted(created, before[0], "right")
+            end = int(left + np.searchsorted(self.columns["id"][rows][left:right], before[1], "left"))
+        start = max(start, end - limit)
+        return slice(rows.start + start, rows.start + max(start, end))
+
+    def find(self, user_id: int, attempt_id: int):
+        # (created_at, id) of one of the user's archived attempts, None when not in this segment
+        rows = self.user_rows(user_id)
+        hit = np.flatnonzero(self.columns["id"][rows] == attempt_id)
+        return (self.columns["created_at"][rows.start + hit[0]], attempt_id) if len(hit) else None
+
+    def rows(self, selection) -> List[dict]:
+        """
+        Attempts in the shape of AttemptResponse.
+        """
+        c = {name: column[selection] for name, column in self.columns.items()}
+        return [
+            {
+                "id": int(c["id"][i]),
+                "quiz_id": self.quiz_id,
+                "user_id": int(c["user_id"][i]),
+                "score": float(c["score"][i]),
+                "quiz_version_id": self.versions[c["version"][i]].decode() if c["version"][i] >= 0 else None,
+                "created_at": _to_datetime(c["created_at"][i]),
+                "started_at": _to_datetime(c["started_at"][i]),
+                "completed_at": _to_datetime(c["completed_at"][i]),
+            }
+            for i in range(len(c["id"]))
+        ]
+
+
+class AttemptArchive:
+    def __init__(self, root: str):
+        self.root = root
+        # open segments and users files by path, a new generation is a new path
+        self._open = LRUCache(max_entries=256, ttl_seconds=0)
+
+    # layout
+
+    def _quiz_dir(self, quiz_id: int) -> str:
+        return os.path.join(self.root, f"quiz={quiz_id}")
+
+    def _users_dir(self) -> str:
+        return os.path.join(self.root, "users")
+
+    def _cached(self, path: str, load):
+        value = self._open.get(path)
+        if value is None:
+            value = self._open.put(path, load())
+        return value
+
+    # reads
+
+    def _load_segment(self, quiz_id: int, month: str, name: str) -> Optional[Segment]:
+        path = os.path.join(self._quiz_dir(quiz_id), name)
+        try:
+            return self._cached(path, lambda: Segment(path, quiz_id, month))
+        except FileNotFoundError:
+            # replaced by a newer generation or purged meanwhile
+            return None
+
+    def segment(self, quiz_id: int, month: str) -> Optional[Segment]:
+        latest = _latest(self._quiz_dir(quiz_id)).get(month)
+        return self._load_segment(quiz_id, month, latest[1]) if latest else None
+
+    def quiz_segments(self, quiz_id: int) -> List[Segment]:
+        latest = sorted(_latest(self._quiz_dir(quiz_id)).items())
+        segments = (self._load_segment(quiz_id, month, name) for month, (_, name) in latest)
+        return [segment for segment in segments if segment is not None]
+
+    def _month_users(self, month: str, name: str) -> np.ndarray:
+        path = os.path.join(self._users_dir(), name)
+        return self._cached(path, lambda: np.load(path, mmap_mode="r").view(np.ndarray))
+
+    def _user_months(self, user_id: int) -> Iterator[Tuple[str, List[Segment]]]:
+        # (month, segments holding the user's attempts), newest month first
+        lo, hi = user_id << 32, (user_id + 1) << 32
+        for month, (_, name) in sorted(_latest(self._users_dir()).items(), reverse=True):
+            try:
+                keys = self._month_users(month, name)
+            except FileNotFoundError:
+                continue
+            segments = [
+                self.segment(int(key) & 0xFFFFFFFF, month)
+                for key in keys[np.searchsorted(keys, lo):np.searchsorted(keys, hi)]
+            ]
+            segments = [segment for segment in segments if segment is not None]
+            if segments:
+                yield month, segments
+
+    def user_attempts(self, user_id: int) -> List[dict]:
+        """
+        All archived attempts of one user, newest first.
+        """
+        found: List[dict] = []
+        for _, segments in self._user_months(user_id):
+            month = [row for segment in segments for row in segment.rows(segment.user_rows(user_id))]
+            found += sorted(month, key=lambda a: (a["created_at"], a["id"]), reverse=True)
+        return found
+
+    def user_history(
+        self,
+        user_id: int,
+        limit: int,
+        since: Optional[datetime] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        cursor: Optional[int] = None
+    ) -> List[dict]:
+        """
+        One page of a user's archived attempts, newest first. The page starts after
+        the (created_at, id) key before, or after the archived attempt cursor.
+        Months are walked newest first and each segment is only read from the
+        page's start on, so a page costs about `limit` rows however deep it is.
+        """
+        since64 = np.datetime64(_naive_utc(since), "us") if since is not None else None
+        key = None
+        if before is not None:
+            key = (np.datetime64(_naive_utc(before[0]), "us"), before[1])
+
+        found: List[dict] = []
+        for month, segments in self._user_months(user_id):
+            if since is not None and month < month_label(_naive_utc(since)):
+                break
+            if key is None and cursor is not None:
+                # attempts of newer months come before the cursor, skip to the month holding it
+                key = next((k for k in (s.find(user_id, cursor) for s in segments) if k is not None), None)
+                if key is None:
+                    continue
+            elif key is not None and month > month_label(key[0].astype(datetime)):
+                continue
+
+            rows = [
+                row for segment in segments
+                for row in segment.rows(segment.user_page(user_id, limit - len(found), since64, key))
+            ]
+            found += sorted(rows, key=lambda a: (a["created_at"], a["id"]), reverse=True)[:limit - len(found)]
+            if len(found) >= limit:
+                break
+        return found
+
+    def quiz_stats(self, quiz_id: int) -> List[dict]:
+        """
+        Per month: attempts, completed attempts, average and best score of completed ones.
+        """
+        stats = []
+        for segment in self.quiz_segments(quiz_id):
+            completed = ~np.isnat(segment.columns["completed_at"])
+            scores = segment.columns["score"][completed]
+            stats.append({
+                "month": segment.month,
+                "attempts": len(segment),
+                "completed": int(completed.sum()),
+                "average_score": float(scores.mean()) if len(scores) else None,
+                "best_score": float(scores.max()) if len(scores) else None,
+            })
+        return stats
+
+    def quiz_top(self, quiz_id: int, limit: int, since: Optional[datetime] = None) -> List[dict]:
+        """
+        Best scoring archived attempts of a quiz, best first.
+        """
+        candidates: List[dict] = []
+        since64 = np.datetime64(_naive_utc(since), "us") if since else None
+        for segment in self.quiz_segments(quiz_id):
+            scores = np.asarray(segment.columns["score"])
+            if since64 is not None:
+                scores = np.where(segment.columns["created_at"] >= since64, scores, -np.inf)
+            top = np.argsort(-scores, kind="stable")[:limit]
+            candidates += [row for row, i in zip(segment.rows(top), top) if np.isfinite(scores[i])]
+        candidates.sort(key=lambda a: -a["score"])
+        return candidates[:limit]
+
+    def user_totals(self, quiz_id: int) -> List[dict]:
+        """
+        Per user aggregates of completed archived attempts, in attempt_summaries columns.
+        """
+        segments = self.quiz_segments(quiz_id)
+        if not segments:
+            return []
+        users = np.concatenate([s.columns["user_id"] for s in segments])
+        scores = np.concatenate([s.columns["score"] for s in segments])
+        completed_at = np.concatenate([s.columns["completed_at"] for s in segments])
+        done = ~np.isnat(completed_at)
+        users, scores, completed_at = users[done], scores[done], completed_at[done]
+        if not len(users):
+            return []
+
+        order = np.lexsort((completed_at, users))
+        users, scores, completed_at = users[order], scores[order], completed_at[order]
+        starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        ends = np.r_[starts[1:], len(users)] - 1
+        counts = np.diff(np.r_[starts, len(users)])
+        best = np.maximum.reduceat(scores, starts)
+        total = np.add.reduceat(scores, starts)
+        return [
+            {
+                "user_id": int(users[s]),
+                "quiz_id": quiz_id,
+                "attempt_count": int(n),
+                "best_score": float(b),
+                "last_score": float(scores[e]),
+                "score_sum": float(t),
+                "last_attempt_at": _to_datetime(completed_at[e]),
+            }
+            for s, e, n, b, t in zip(starts, ends, counts, best, total)
+        ]
+
+    # writes, used by app/jobs/archive.py only
+
+    def write_segment(self, quiz_id: int, month: str, rows: List[dict]) -> np.ndarray:
+        """
+        Merge attempts into the quiz's segment for month as a new generation.
+        Rows already archived (same id) are replaced, so re-running after a crash
+        is safe. Returns the user ids of the whole segment.
+        """
+        directory = self._quiz_dir(quiz_id)
+        os.makedirs(directory, exist_ok=True)
+        latest = _latest(directory).get(month)
+
+        columns = {
+            "id": np.array([r["id"] for r in rows], dtype=COLUMNS["id"]),
+            "user_id": np.array([-1 if r["user_id"] is None else r["user_id"] for r in rows], dtype=COLUMNS["user_id"]),
+            "score": np.array([r["score"] or 0.0 for r in rows], dtype=COLUMNS["score"]),
+            "version_id": np.array([r["quiz_version_id"] or "" for r in rows], dtype="S64"),
+        }
+        for name in ("created_at", "started_at", "completed_at"):
+            columns[name] = np.array([_naive_utc(r[name]) for r in rows], dtype=COLUMNS[name])
+
+        if latest is not None:
+            old = Segment(os.path.join(directory, latest[1]), quiz_id, month)
+            keep = ~np.isin(old.columns["id"], columns["id"])
+            old_columns = {name: np.asarray(old.columns[name])[keep] for name in COLUMNS}
+            old_columns["version_id"] = (
+                np.where(old_columns["version"] >= 0, old.versions[np.maximum(old_columns["version"], 0)], b"")
+                if len(old.versions) else np.full(int(keep.sum()), b"", dtype="S64")
+            )
+            columns = {name: np.concatenate([old_columns[name], values]) for name, values in columns.items()}
+
+        # dictionary encode version ids, b"" (no version) sorts first and becomes -1
+        versions, columns["version"] = np.unique(columns.pop("version_id"), return_inverse=True)
+        if len(versions) and versions[0] == b"":
+            versions, columns["version"] = versions[1:], columns["version"] - 1
+
+        order = np.lexsort((columns["id"], columns["created_at"], columns["user_id"]))
+        generation = latest[0] + 1 if latest else 0
+        final = os.path.join(directory, f"{month}.{generation}")
+        staging = f"{final}.tmp"
+        os.makedirs(staging, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(staging, f"{name}.npy"), columns[name][order].astype(dtype))
+        np.save(os.path.join(staging, "versions.npy"), versions.astype("S64"))
+        os.rename(staging, final)
+        _remove_older(directory, month, generation)
+        return columns["user_id"]
+
+    def write_month_users(self, month: str, pairs: np.ndarray) -> None:
+        """
+        Merge (user_id << 32 | quiz_id) keys into the users file of a month.
+        """
+        directory = self._users_dir()
+        os.makedirs(directory, exist_ok=True)
+        latest = _latest(directory).get(month)
+        if latest is not None:
+            pairs = np.concatenate([np.load(os.path.join(directory, latest[1])), pairs])
+        generation = latest[0] + 1 if latest else 0
+        staging = os.path.join(directory, f"{month}.{generation}.tmp.npy")
+        np.save(staging, np.unique(pairs.astype(np.int64)))
+        os.rename(staging, os.path.join(directory, f"{month}.{generation}.npy"))
+        _remove_older(directory, month, generation)
+
+    def remove_quiz(self, quiz_id: int) -> None:
+        # users files may still list the quiz, readers skip segments that are gone
+        shutil.rmtree(self._quiz_dir(quiz_id), ignore_errors=True)
+
+
+_archives: Dict[str, AttemptArchive] = {}
+
+
+def get_archive() -> Optional[AttemptArchive]:
+    """
+    The configured archive (ARCHIVE_DIR), None when archiving is off.
+    """
+    root = get_settings().archive_dir
+    if not root:
+        return None
+    if root not in _archives:
+        _archives[root] = AttemptArchive(root)
+    return _archives[root]
@@ -0,0 +1,212 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+from app.models.quiz import Attempt, AttemptAnswer, AttemptSummary, Question
+from app.services.archive import get_archive
+
+
+# network latency allowance on top of a quiz's time limit
+TIME_LIMIT_GRACE_SECONDS = 10
+
+
+def time_is_up(attempt: Attempt, time_limit: Optional[int]) -> bool:
+    """
+    Whether the attempt ran past the time limit of the version it started on.
+    """
+    if not time_limit:
+        return False
+    started_at = attempt.started_at
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    elapsed = (datetime.now(timezone.utc) - started_at).total_seconds()
+    return elapsed > time_limit + TIME_LIMIT_GRACE_SECONDS
+
+
+def finish_attempt(db: Session, attempt_id: int, score: float) -> bool:
+    """
+    Finalize an attempt exactly once.
+    Conditional UPDATE, so only one of several concurrent submits wins.
+    """
+    result = db.execute(
+        update(Attempt)
+        .where(Attempt.id == attempt_id, Attempt.completed_at.is_(None))
+        .values(score=score, completed_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def record_answers(
+    db: Session,
+    attempt_id: int,
+    quiz_id: int,
+    user_answers: Dict[int, int],
+    answer_key: Dict[int, Set[int]]
+) -> int:
+    """
+    Store the submitted answers in one INSERT so attempts can be re-graded later.
+    Answers to questions deleted since the attempt started are skipped,
+    retired ones (removed_at) are still recorded.
+    """
+    answered = [question_id for question_id in user_answers if question_id in answer_key]
+    if not answered:
+        return 0
+    existing = set(db.scalars(
+        select(Question.id).where(Question.quiz_id == quiz_id, Question.id.in_(answered))
+    ))
+    rows = [
+        {
+            "attempt_id": attempt_id,
+            "question_id": question_id,
+            "choice_id": user_answers[question_id],
+            "is_correct": user_answers[question_id] in answer_key[question_id],
+        }
+        for question_id in answered if question_id in existing
+    ]
+    if rows:
+        db.execute(insert(AttemptAnswer), rows)
+    return len(rows)
+
+
+def _upsert(db: Session):
+    # ON CONFLICT exists in both dialects we run on, only the import differs
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert, func.greatest
+    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert, func.max
+
+
+def update_summaries(db: Session, results: List[dict]) -> None:
+    """
+    Fold finished attempts into attempt_summaries with one upsert statement.
+    Each result has user_id, quiz_id, score and completed_at.
+    """
+    if not results:
+        return
+    dialect_insert, greatest = _upsert(db)
+    stmt = dialect_insert(AttemptSummary)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AttemptSummary.user_id, AttemptSummary.quiz_id],
+        set_={
+            "attempt_count": AttemptSummary.attempt_count + 1,
+            "best_score": greatest(AttemptSummary.best_score, stmt.excluded.best_score),
+            "last_score": stmt.excluded.last_score,
+            "score_sum": AttemptSummary.score_sum + stmt.excluded.score_sum,
+            "last_attempt_at": stmt.excluded.last_attempt_at,
+        }
+    )
+    db.execute(stmt, [
+        {
+            "user_id": r["user_id"],
+            "quiz_id": r["quiz_id"],
+            "attempt_count": 1,
+            "best_score": r["score"],
+            "last_score": r["score"],
+            "score_sum": r["score"],
+            "last_attempt_at": r["completed_at"],
+        }
+        for r in results
+    ])
+
+
+def rebuild_summaries(db: Session, quiz_id: int) -> None:
+    """
+    Recompute one quiz's summaries from its attempts in two set-based statements,
+    used after scores were rewritten in bulk (re-grade).
+    """
+    latest = aliased(Attempt)
+    last_score = (
+        select(latest.score)
+        .where(
+            latest.user_id == Attempt.user_id,
+            latest.quiz_id == Attempt.quiz_id,
+            latest.completed_at.is_not(None)
+        )
+        .order_by(latest.completed_at.desc(), latest.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    stats = (
+        select(
+            Attempt.user_id,
+            Attempt.quiz_id,
+            func.count(),
+            func.max(Attempt.score),
+            last_score,
+            func.sum(Attempt.score),
+            func.max(Attempt.completed_at),
+        )
+        .where(Attempt.quiz_id == quiz_id, Attempt.completed_at.is_not(None))
+        .group_by(Attempt.user_id, Attempt.quiz_id)
+    )
+    db.execute(delete(AttemptSummary).where(AttemptSummary.quiz_id == quiz_id))
+    db.execute(insert(AttemptSummary).from_select(
+        ["user_id", "quiz_id", "attempt_count", "best_score", "last_score", "score_sum", "last_attempt_at"],
+        stats
+    ))
+
+    archive = get_archive()
+    archived = archive.user_totals(quiz_id) if archive else []
+    if archived:
+        # archived attempts still count; they are older than any left in the table,
+        # so an existing row keeps its last score
+        dialect_insert, greatest = _upsert(db)
+        stmt = dialect_insert(AttemptSummary)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AttemptSummary.user_id, AttemptSummary.quiz_id],
+            set_={
+                "attempt_count": AttemptSummary.attempt_count + stmt.excluded.attempt_count,
+                "best_score": greatest(AttemptSummary.best_score, stmt.excluded.best_score),
+                "score_sum": AttemptSummary.score_sum + stmt.excluded.score_sum,
+            }
+        )
+        db.execute(stmt, archived)
+
+
+def _month(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc("month", column), "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def monthly_stats(db: Session, quiz_id: int) -> List[dict]:
+    """
+    Attempts, completed attempts, average and best score per month, from the
+    attempts table and the archive together.
+    """
+    month = _month(db, Attempt.created_at)
+    score = case((Attempt.completed_at.is_not(None), Attempt.score))
+    rows = db.execute(
+        select(month, func.count(), func.count(Attempt.completed_at), func.sum(score), func.max(score))
+        .where(Attempt.quiz_id == quiz_id)
+        .group_by(month)
+    ).all()
+
+    archive = get_archive()
+    by_month: Dict[str, dict] = {
+        m["month"]: {**m, "score_sum": (m["average_score"] or 0.0) * m["completed"]}
+        for m in (archive.quiz_stats(quiz_id) if archive else [])
+    }
+    # a month can be in both while the archive job is still deleting it
+    for label, attempts, completed, score_sum, best in rows:
+        stats = by_month.setdefault(label, {
+            "month": label, "attempts": 0, "completed": 0, "score_sum": 0.0, "best_score": None
+        })
+        stats["attempts"] += attempts
+        stats["completed"] += completed
+        stats["score_sum"] += score_sum or 0.0
+        if best is not None:
+            stats["best_score"] = max(best, stats["best_score"] or best)
+
+    return [
+        {
+            "month": stats["month"],
+            "attempts": stats["attempts"],
+            "completed": stats["completed"],
+            "average_score": stats["score_sum"] / stats["completed"] if stats["completed"] else None,
+            "best_score": stats["best_score"],
+        }
+        for stats in sorted(by_month.values(), key=lambda m: m["month"])
+    ]
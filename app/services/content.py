@@ -0,0 +1,106 @@
+"""
+Diff-based edits of quiz questions and choices.
+
+A patch is applied with a handful of set-based statements regardless of the
+size of the quiz: one statement per table for removals, one executemany UPDATE by
+primary key per table and one multi-row INSERT per table. Ids of untouched
+questions and choices never change. Removed questions are retired (removed_at)
+rather than deleted, attempts already answered them.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.quiz import Choice, Question
+from app.schemas.quiz import QuizContentPatch
+from app.services.dedup import index_questions, remove_from_index
+
+
+class ContentPatchError(ValueError):
+    pass
+
+
+def _check_ids(db: Session, quiz_id: int, patch: QuizContentPatch) -> None:
+    question_ids = {q.id for q in patch.update_questions} | set(patch.remove_questions)
+    if question_ids:
+        found = set(db.scalars(
+            select(Question.id).where(
+                Question.quiz_id == quiz_id, Question.removed_at.is_(None), Question.id.in_(question_ids)
+            )
+        ))
+        missing = question_ids - found
+        if missing:
+            raise ContentPatchError(f"Questions not in this quiz: {sorted(missing)}")
+
+    updated = {q.id for q in patch.update_questions}
+    if updated & set(patch.remove_questions):
+        raise ContentPatchError("A question cannot be updated and removed in one patch")
+
+    choice_owner = {
+        choice_id: q.id
+        for q in patch.update_questions
+        for choice_id in [c.id for c in q.update_choices] + q.remove_choices
+    }
+    if choice_owner:
+        found = dict(db.execute(
+            select(Choice.id, Choice.question_id).where(Choice.id.in_(choice_owner))
+        ).all())
+        wrong = sorted(cid for cid, qid in choice_owner.items() if found.get(cid) != qid)
+        if wrong:
+            raise ContentPatchError(f"Choices not in their question: {wrong}")
+
+
+def apply_content_patch(db: Session, quiz_id: int, patch: QuizContentPatch) -> None:
+    """
+    Apply the patch in the caller's transaction. Raises ContentPatchError for
+    ids that do not belong to the quiz; nothing is written in that case.
+    """
+    _check_ids(db, quiz_id, patch)
+
+    # 1. Removals, retired questions keep their choices for the answers recorded against them
+    removed_choices = [cid for q in patch.update_questions for cid in q.remove_choices]
+    if patch.remove_questions:
+        remove_from_index(db, patch.remove_questions)
+        db.execute(
+            update(Question).where(Question.id.in_(patch.remove_questions))
+            .values(removed_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+    if removed_choices:
+        db.execute(
+            delete(Choice).where(Choice.id.in_(removed_choices))
+            .execution_options(synchronize_session=False)
+        )
+
+    # 2. Updates, executemany UPDATE ... WHERE id = ? with only the sent fields
+    question_rows = [{"id": q.id, "text": q.text} for q in patch.update_questions if q.text is not None]
+    if question_rows:
+        db.execute(update(Question), question_rows)
+        index_questions(db, [(row["id"], row["text"]) for row in question_rows])
+    choice_rows = [
+        {"id": c.id, **c.model_dump(exclude={"id"}, exclude_none=True)}
+        for q in patch.update_questions for c in q.update_choices
+    ]
+    choice_rows = [row for row in choice_rows if len(row) > 1]
+    if choice_rows:
+        db.execute(update(Choice), choice_rows)
+
+    # 3. Inserts, new question ids come back in parameter order
+    new_choices: List[Dict] = [
+        {"question_id": q.id, "text": c.text, "is_correct": c.is_correct}
+        for q in patch.update_questions for c in q.add_choices
+    ]
+    if patch.add_questions:
+        new_ids = db.scalars(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            [{"quiz_id": quiz_id, "text": q.text} for q in patch.add_questions]
+        ).all()
+        new_choices += [
+            {"question_id": question_id, "text": c.text, "is_correct": c.is_correct}
+            for question_id, q in zip(new_ids, patch.add_questions) for c in q.choices
+        ]
+        index_questions(db, [(question_id, q.text) for question_id, q in zip(new_ids, patch.add_questions)])
+    if new_choices:
+        db.execute(insert(Choice), new_choices)
@@ -0,0 +1,209 @@
+"""
+Near-duplicate question detection with MinHash and LSH.
+
+Question text is normalized (NFKC, case folded, punctuation collapsed) and cut
+into overlapping 5-byte shingles. A MinHash signature keeps the minimum of
+NUM_PERMUTATIONS random hash permutations over those shingles; the share of
+equal positions in two signatures estimates the Jaccard similarity of their
+shingle sets.
+
+Signatures are split into BANDS bands of ROWS values and every band is hashed
+into one int64 bucket key stored in question_lsh_buckets. Two questions become
+candidates when they share a bucket, which for 20 bands of 6 rows happens with
+probability 1 - (1 - s^6)^20: 0.998 at similarity 0.8, 0.27 at 0.5 and 0.015
+at 0.3. Candidates come from one indexed IN lookup on bucket keys, so nothing
+is ever compared pairwise across the whole bank. Changing any of the constants
+below invalidates stored signatures (python -m app.jobs.dedup index --rebuild).
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.quiz import Question, QuestionBucket, QuestionSignature, Quiz
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 120
+BANDS, ROWS = 20, 6
+
+# multiply-add-shift permutations h(x) = ((a * x + b) mod 2^64) >> 32, no modulo needed
+_rng = np.random.default_rng(20261019)
+_A = _rng.integers(1, 1 << 63, size=NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_HASH_SHIFT = np.uint64(32)
+# band rows are mixed into one key with odd multipliers (wrapping uint64 arithmetic)
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, size=ROWS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALTS = _rng.integers(1, 1 << 63, size=BANDS, dtype=np.uint64)
+_SHIFTS = np.arange(SHINGLE_SIZE - 1, -1, -1, dtype=np.uint64) * np.uint64(8)
+
+# shingles hashed per block, a 4 MiB permutations x shingles matrix stays in cache
+MAX_BLOCK = 1 << 12
+# texts looked up per IN query (BANDS keys each)
+LOOKUP_CHUNK = 500
+MAX_MATCHES = 10
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def _shingles(text: str) -> np.ndarray:
+    data = np.frombuffer(normalize(text).encode(), dtype=np.uint8).astype(np.uint64)
+    if len(data) < SHINGLE_SIZE:
+        data = np.pad(data, (0, SHINGLE_SIZE - len(data)))
+    # every 5-byte window read as one 40-bit integer
+    return (sliding_window_view(data, SHINGLE_SIZE) << _SHIFTS).sum(axis=1)
+
+
+def signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    MinHash signatures, one uint32 row of NUM_PERMUTATIONS values per text.
+    """
+    shingles = [_shingles(text) for text in texts]
+    result = np.empty((len(texts), NUM_PERMUTATIONS), dtype=np.uint32)
+    start = 0
+    while start < len(texts):
+        end, size = start + 1, len(shingles[start])
+        while end < len(texts) and size + len(shingles[end]) <= MAX_BLOCK:
+            size += len(shingles[end])
+            end += 1
+        block = shingles[start:end]
+        hashed = ((_A[:, None] * np.concatenate(block)[None, :] + _B[:, None]) >> _HASH_SHIFT).astype(np.uint32)
+        offsets = np.cumsum([0] + [len(s) for s in block[:-1]])
+        result[start:end] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        start = end
+    return result
+
+
+def band_keys(signature_rows: np.ndarray) -> np.ndarray:
+    """
+    One int64 bucket key per band, shape (texts, BANDS).
+    """
+    bands = signature_rows.reshape(len(signature_rows), BANDS, ROWS).astype(np.uint64)
+    keys = (bands * _BAND_MULTIPLIERS).sum(axis=2) + _BAND_SALTS
+    return keys.view(np.int64)
+
+
+def similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Estimated Jaccard similarity of one signature against each row of others.
+    """
+    return (others == signature).mean(axis=-1)
+
+
+def remove_from_index(db: Session, question_ids: Sequence[int]) -> None:
+    if not question_ids:
+        return
+    for model in (QuestionBucket, QuestionSignature):
+        db.execute(
+            delete(model).where(model.question_id.in_(question_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def index_questions(db: Session, questions: Iterable[Tuple[int, str]]) -> int:
+    """
+    Store signatures and bucket keys of (question id, text) pairs in the
+    caller's transaction, replacing whatever was indexed for those ids.
+    """
+    questions = list(questions)
+    if not questions:
+        return 0
+    question_ids = [question_id for question_id, _ in questions]
+    remove_from_index(db, question_ids)
+
+    signature_rows = signatures([text for _, text in questions])
+    db.execute(insert(QuestionSignature), [
+        {"question_id": question_id, "signature": row.tobytes()}
+        for question_id, row in zip(question_ids, signature_rows)
+    ])
+    db.execute(insert(QuestionBucket), [
+        {"bucket": key, "question_id": question_id}
+        for question_id, keys in zip(question_ids, band_keys(signature_rows))
+        for key in set(keys.tolist())
+    ])
+    return len(questions)
+
+
+def load_signatures(db: Session, question_ids: Sequence[int]) -> Dict[int, Tuple[int, np.ndarray]]:
+    """
+    question id -> (quiz id, signature) for questions of quizzes that are not deleted.
+    """
+    rows = db.execute(
+        select(QuestionSignature.question_id, Question.quiz_id, QuestionSignature.signature)
+        .join(Question, Question.id == QuestionSignature.question_id)
+        .join(Quiz, Quiz.id == Question.quiz_id)
+        .where(QuestionSignature.question_id.in_(question_ids), Quiz.deleted_at.is_(None))
+    )
+    return {
+        row.question_id: (row.quiz_id, np.frombuffer(row.signature, dtype=np.uint32))
+        for row in rows
+    }
+
+
+def find_duplicates(
+    db: Session,
+    texts: Sequence[str],
+    threshold: float,
+    limit: int = MAX_MATCHES
+) -> List[List[dict]]:
+    """
+    Near-duplicates of each text, both in the indexed bank and earlier in texts
+    itself (an import batch repeating a question). One list of matches per text,
+    most similar first; bank matches carry question_id and quiz_id, batch
+    matches carry batch_index.
+    """
+    signature_rows = signatures(texts)
+    keys = band_keys(signature_rows)
+    matches: List[List[dict]] = [[] for _ in texts]
+
+    # within the batch, texts sharing a bucket with an earlier one
+    seen: Dict[int, List[int]] = {}
+    for index, row in enumerate(keys.tolist()):
+        earlier = {other for key in row for other in seen.get(key, ())}
+        for key in row:
+            seen.setdefault(key, []).append(index)
+        if earlier:
+            others = sorted(earlier)
+            scores = similarity(signature_rows[index], signature_rows[others])
+            matches[index] += [
+                {"batch_index": other, "similarity": float(score)}
+                for other, score in zip(others, scores) if score >= threshold
+            ]
+
+    for start in range(0, len(texts), LOOKUP_CHUNK):
+        chunk_keys = keys[start:start + LOOKUP_CHUNK]
+        key_owner: Dict[int, List[int]] = {}
+        for offset, row in enumerate(chunk_keys.tolist()):
+            for key in row:
+                key_owner.setdefault(key, []).append(start + offset)
+
+        candidates: Dict[int, set] = {}
+        for bucket, question_id in db.execute(
+            select(QuestionBucket.bucket, QuestionBucket.question_id)
+            .where(QuestionBucket.bucket.in_(list(key_owner)))
+        ):
+            for index in key_owner[bucket]:
+                candidates.setdefault(index, set()).add(question_id)
+        if not candidates:
+            continue
+
+        stored = load_signatures(db, list(set().union(*candidates.values())))
+        for index, question_ids in candidates.items():
+            question_ids = [qid for qid in sorted(question_ids) if qid in stored]
+            if not question_ids:
+                continue
+            scores = similarity(signature_rows[index], np.stack([stored[qid][1] for qid in question_ids]))
+            matches[index] += [
+                {"question_id": qid, "quiz_id": stored[qid][0], "similarity": float(score)}
+                for qid, score in zip(question_ids, scores) if score >= threshold
+            ]
+
+    return [sorted(found, key=lambda m: -m["similarity"])[:limit] for found in matches]
+
@@ -0,0 +1,309 @@
+"""
+Live "host mode" quiz sessions.
+
+State lives in the memory of the process that created the session, so the
+/live routes are only mounted with LIVE_ENABLED and gunicorn.conf.py refuses to
+start such a process with more than one worker. Deployments run it as its own
+single-worker service next to the API (see docker-compose.yml).
+Sessions play the quiz version that was current when they were opened: questions
+come from its snapshot and answers are scored against its answer key, held in
+memory. Results are written to `attempts` in one batch when the session ends.
+"""
+import asyncio
+import heapq
+import json
+import secrets
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.quiz import Attempt, QuizVersion
+from app.services.attempts import update_summaries
+from app.services.versions import VersionRules
+
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 6
+
+# messages a slow player may lag behind before being disconnected
+PLAYER_QUEUE_SIZE = 16
+LEADERBOARD_SIZE = 10
+
+
+class LivePlayer:
+    """
+    One connected socket. Messages go through a bounded queue drained by a
+    dedicated sender task, so a broadcast never awaits a single slow client.
+    """
+
+    def __init__(self, user_id: int, username: str, websocket):
+        self.user_id = user_id
+        self.username = username
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=PLAYER_QUEUE_SIZE)
+        self.correct = 0
+        self.answered: Set[int] = set()
+        self.connected = True
+        self.sender: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self.sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:
+                    break
+                await self.websocket.send_text(message)
+        except Exception:
+            # socket closed under us, the receive loop cleans up
+            pass
+        finally:
+            self.connected = False
+
+    def send(self, message: str) -> bool:
+        if not self.connected:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.connected = False
+            return False
+
+    async def close(self) -> None:
+        self.connected = False
+        if self.sender:
+            self.sender.cancel()
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+
+class LiveSession:
+    def __init__(
+        self,
+        code: str,
+        version: QuizVersion,
+        rules: VersionRules,
+        host_id: int,
+        question_seconds: float,
+        reveal_seconds: float
+    ):
+        self.code = code
+        self.quiz_id = version.quiz_id
+        self.quiz_version_id = version.id
+        self.host_id = host_id
+        self.question_seconds = question_seconds
+        self.reveal_seconds = reveal_seconds
+
+        # questions without the answer key, safe to send to players
+        self.questions = [
+            {
+                "id": question["id"],
+                "text": question["text"],
+                "choices": [{"id": c["id"], "text": c["text"]} for c in question["choices"]],
+            }
+            for question in version.content["questions"]
+        ]
+        self.answer_key: Dict[int, Set[int]] = rules.answer_key
+
+        self.players: Dict[int, LivePlayer] = {}
+        self.hosts: List[LivePlayer] = []
+        self.state = "lobby"
+        self.host_reserved = False
+        self.current_question_id: Optional[int] = None
+        self.started_at: Optional[datetime] = None
+        self._answers_in = 0
+        self._all_answered = asyncio.Event()
+
+    # connections
+
+    def join(self, player: LivePlayer) -> None:
+        previous = self.players.get(player.user_id)
+        if previous:
+            # reconnect keeps the score of the old socket
+            player.correct = previous.correct
+            player.answered = previous.answered
+            previous.connected = False
+        self.players[player.user_id] = player
+        player.start()
+        self.send_to_hosts({"type": "lobby", "players": len(self.players)})
+
+    def reserve_host(self) -> bool:
+        """
+        Claim the one host slot. Only a session still in the lobby without a host
+        can be claimed, so a second host socket cannot start the schedule again.
+        """
+        if self.state != "lobby" or self.host_reserved:
+            return False
+        self.host_reserved = True
+        return True
+
+    def attach_host(self, host: LivePlayer) -> None:
+        self.hosts.append(host)
+        host.start()
+
+    # messaging
+
+    def broadcast(self, message: dict) -> int:
+        """
+        Encode once, enqueue for every socket. Returns how many sockets accepted it.
+        """
+        encoded = json.dumps(message)
+        delivered = 0
+        for player in self.players.values():
+            if player.send(encoded):
+                delivered += 1
+        for host in self.hosts:
+            host.send(encoded)
+        return delivered
+
+    def send_to_hosts(self, message: dict) -> None:
+        encoded = json.dumps(message)
+        for host in self.hosts:
+            host.send(encoded)
+
+    # scoring
+
+    def submit_answer(self, user_id: int, question_id: int, choice_id: int) -> bool:
+        """
+        Score an answer for the open question. First answer per question counts.
+        """
+        player = self.players.get(user_id)
+        if (
+            player is None
+            or self.state != "question"
+            or question_id != self.current_question_id
+            or question_id in player.answered
+        ):
+            return False
+
+        player.answered.add(question_id)
+        if choice_id in self.answer_key[question_id]:
+            player.correct += 1
+
+        self._answers_in += 1
+        if self._answers_in >= len(self.players):
+            self._all_answered.set()
+        return True
+
+    def leaderboard(self, size: int = LEADERBOARD_SIZE) -> List[dict]:
+        top = heapq.nlargest(size, self.players.values(), key=lambda p: p.correct)
+        return [
+            {"rank": rank, "username": p.username, "correct": p.correct}
+            for rank, p in enumerate(top, start=1)
+        ]
+
+    # schedule
+
+    async def run(self) -> None:
+        self.state = "running"
+        self.started_at = datetime.now(timezone.utc)
+        total = len(self.questions)
+
+        for index, question in enumerate(self.questions, start=1):
+            self.current_question_id = question["id"]
+            self._answers_in = 0
+            self._all_answered.clear()
+            self.state = "question"
+            self.broadcast({
+                "type": "question",
+                "index": index,
+                "total": total,
+                "seconds": self.question_seconds,
+                "question": question,
+            })
+
+            # close early once every player answered
+            try:
+                await asyncio.wait_for(self._all_answered.wait(), timeout=self.question_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+            self.state = "reveal"
+            self.broadcast({
+                "type": "leaderboard",
+                "question_id": question["id"],
+                "correct_choice_ids": sorted(self.answer_key[question["id"]]),
+                "top": self.leaderboard(),
+            })
+            if index < total:
+                await asyncio.sleep(self.reveal_seconds)
+
+        self.state = "finished"
+        self.current_question_id = None
+        self.broadcast({"type": "finished", "top": self.leaderboard()})
+
+    def persist_results(self, db: Session) -> int:
+        """
+        Write one Attempt per player in a single executemany INSERT.
+        """
+        total = len(self.questions)
+        if not self.players or not total:
+            return 0
+
+        completed_at = datetime.now(timezone.utc)
+        rows = [
+            {
+                "user_id": player.user_id,
+                "quiz_id": self.quiz_id,
+                "quiz_version_id": self.quiz_version_id,
+                "score": (player.correct / total) * 100,
+                "started_at": self.started_at,
+                "completed_at": completed_at,
+            }
+            for player in self.players.values()
+        ]
+        db.execute(insert(Attempt), rows)
+        update_summaries(db, rows)
+        db.commit()
+        return len(rows)
+
+    async def close(self) -> None:
+        connections = [*self.players.values(), *self.hosts]
+        # end marker lets already queued messages (final results) drain first
+        for connection in connections:
+            if connection.connected and not connection.queue.full():
+                connection.queue.put_nowait(None)
+        senders = [c.sender for c in connections if c.sender and not c.sender.done()]
+        if senders:
+            await asyncio.wait(senders, timeout=5)
+        for connection in connections:
+            await connection.close()
+
+
+class LiveSessionRegistry:
+    def __init__(self):
+        self._sessions: Dict[str, LiveSession] = {}
+
+    def create(
+        self,
+        version: QuizVersion,
+        rules: VersionRules,
+        host_id: int,
+        question_seconds: float,
+        reveal_seconds: float
+    ) -> LiveSession:
+        code = self._new_code()
+        session = LiveSession(code, version, rules, host_id, question_seconds, reveal_seconds)
+        self._sessions[code] = session
+        return session
+
+    def get(self, code: str) -> Optional[LiveSession]:
+        return self._sessions.get(code.upper())
+
+    def remove(self, code: str) -> None:
+        self._sessions.pop(code, None)
+
+    def _new_code(self) -> str:
+        while True:
+            code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+            if code not in self._sessions:
+                return code
+
+
+live_sessions = LiveSessionRegistry()
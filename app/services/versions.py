@@ -0,0 +1,112 @@
+"""
+Immutable, content-addressed quiz versions.
+
+Every edit that changes what a quiz renders to creates a QuizVersion whose id is
+the sha256 of its canonical JSON snapshot. Attempts pin the version they started
+on, so anything derived from a version (answer key, rendered payloads) can be
+cached without expiry and scoring is unaffected by later edits.
+"""
+import hashlib
+import json
+from typing import Dict, NamedTuple, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.models.quiz import Choice, Question, Quiz, QuizVersion
+from app.schemas.quiz import QuizResponse
+
+
+
+class VersionRules(NamedTuple):
+    time_limit: Optional[int]
+    # question id -> correct choice ids
+    answer_key: Dict[int, Set[int]]
+
+
+# what scoring needs from a version, keyed by version id
+version_rules = LRUCache(max_entries=4096, ttl_seconds=0)
+
+
+def render_content(db: Session, quiz: Quiz) -> dict:
+    """
+    The quiz as QuizResponse renders it, built from two column queries rather
+    than ORM objects so large question banks snapshot quickly.
+    """
+    choices: Dict[int, list] = {}
+    for row in db.execute(
+        select(Choice.question_id, Choice.id, Choice.text, Choice.is_correct)
+        .join(Question, Question.id == Choice.question_id)
+        .where(Question.quiz_id == quiz.id, Question.removed_at.is_(None))
+        .order_by(Choice.id)
+    ):
+        choices.setdefault(row.question_id, []).append(
+            {"id": row.id, "text": row.text, "is_correct": row.is_correct}
+        )
+    questions = [
+        {"id": row.id, "text": row.text, "choices": choices.get(row.id, [])}
+        for row in db.execute(
+            select(Question.id, Question.text)
+            .where(Question.quiz_id == quiz.id, Question.removed_at.is_(None))
+            .order_by(Question.id)
+        )
+    ]
+    fields = {
+        name: getattr(quiz, name)
+        for name in QuizResponse.model_fields if name not in ("questions", "version_id")
+    }
+    return QuizResponse.model_validate({**fields, "questions": questions}).model_dump(
+        mode="json", exclude={"version_id"}
+    )
+
+
+def content_hash(content: dict) -> str:
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def snapshot_quiz(db: Session, quiz: Quiz) -> str:
+    """
+    Point the quiz at the version matching its current content, creating it if needed.
+    Call after the edit is flushed; the caller commits.
+    """
+    db.flush()
+    content = render_content(db, quiz)
+    version_id = content_hash(content)
+    if db.get(QuizVersion, version_id) is None:
+        db.add(QuizVersion(id=version_id, quiz_id=quiz.id, content=content))
+    quiz.version_id = version_id
+    return version_id
+
+
+def current_version_id(db: Session, quiz: Quiz) -> str:
+    # quizzes created before versioning get their first snapshot lazily
+    if quiz.version_id is None:
+        snapshot_quiz(db, quiz)
+        db.commit()
+    return quiz.version_id
+
+
+def get_version_rules(db: Session, version_id: str) -> Optional[VersionRules]:
+    """
+    Time limit and answer key of a version, None when the version does not exist.
+    """
+    rules = version_rules.get(version_id)
+    if rules is None:
+        version = db.get(QuizVersion, version_id)
+        if version is None:
+            return None
+        rules = version_rules.put(version_id, VersionRules(
+            time_limit=version.content.get("time_limit"),
+            answer_key={
+                question["id"]: {c["id"] for c in question["choices"] if c["is_correct"]}
+                for question in version.content["questions"]
+            }
+        ))
+    return rules
+
+
+def get_answer_key(db: Session, version_id: str) -> Optional[Dict[int, Set[int]]]:
+    rules = get_version_rules(db, version_id)
+    return rules.answer_key if rules else None
@@ -0,0 +1,64 @@
+"""
+Cost of adaptive item selection, ability updates and calibration.
+
+    python -m benchmarks.adaptive_selection [--pool 10000] [--persons 5000] [--items 500]
+
+Selection and posterior updates are what next-question runs per request;
+calibration is the offline job, measured on simulated responses with known
+item parameters.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services import irt
+
+
+def timed(fn, repeat: int = 200) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs)
+
+
+def simulate(rng, persons: int, items: int, per_person: int):
+    a = rng.lognormal(0.0, 0.3, items)
+    b = rng.normal(0.0, 1.0, items)
+    theta = rng.normal(0.0, 1.0, persons)
+    person_idx = np.repeat(np.arange(persons), per_person)
+    item_idx = np.concatenate([rng.choice(items, per_person, replace=False) for _ in range(persons)])
+    p = irt.probability(theta[person_idx], a[item_idx], b[item_idx])
+    return a, b, person_idx, item_idx, rng.random(len(p)) < p
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pool", type=int, default=10000)
+    parser.add_argument("--persons", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--per-person", type=int, default=40)
+    args = parser.parse_args()
+    rng = np.random.default_rng(7)
+
+    pool = irt.ItemPool(np.arange(args.pool), rng.lognormal(0.0, 0.3, args.pool), rng.normal(0.0, 1.0, args.pool))
+    administered = list(rng.choice(args.pool, 30, replace=False))
+    print(f"select_next over {args.pool} items     median {timed(lambda: pool.select_next(0.3, administered)):7.3f} ms")
+
+    log_posterior = irt.initial_log_posterior()
+    print(f"posterior update + estimate     median "
+          f"{timed(lambda: irt.estimate(irt.update_log_posterior(log_posterior, 1.2, 0.4, True))):7.3f} ms")
+
+    a, b, person_idx, item_idx, correct = simulate(rng, args.persons, args.items, args.per_person)
+    t0 = time.perf_counter()
+    fit_a, fit_b = irt.fit_2pl(person_idx, item_idx, correct, args.items)
+    elapsed = time.perf_counter() - t0
+    print(f"fit_2pl {len(correct)} responses, {args.items} items: {elapsed:.2f} s, "
+          f"r(a) {np.corrcoef(a, fit_a)[0, 1]:.2f}, r(b) {np.corrcoef(b, fit_b)[0, 1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
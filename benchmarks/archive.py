@@ -0,0 +1,119 @@
+"""
+Archive job throughput and history reads from the archive vs the attempts table.
+
+    python -m benchmarks.archive [--attempts 500000] [--quizzes 200] [--users 20000] [--months 24]
+
+Fills a scratch SQLite file with attempts spread over --months months, times
+one user's history and one quiz's monthly stats while the rows are in the
+table, archives them all, then times the same reads from the memory-mapped
+segments, and the first and last keyset page of the user's archived history.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.jobs.archive import archive_before
+from app.models.quiz import Attempt, Quiz
+from app.models.user import User
+from app.services.archive import AttemptArchive
+from app.services.attempts import monthly_stats
+
+
+def timed(fn, repeat: int = 20) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs)
+
+
+def build(db: Session, attempts: int, quizzes: int, users: int, months: int) -> None:
+    rng = np.random.default_rng(5)
+    db.execute(insert(User), [
+        {"email": f"u{n}@test.com", "username": f"u{n}", "hashed_password": "x"} for n in range(users)
+    ])
+    db.execute(insert(Quiz), [{"title": f"Quiz {n}", "creator_id": 1} for n in range(quizzes)])
+    start = datetime(2020, 1, 1)
+    offsets = np.sort(rng.integers(0, months * 30 * 86400, size=attempts))
+    quiz_ids = rng.integers(1, quizzes + 1, size=attempts)
+    user_ids = rng.integers(1, users + 1, size=attempts)
+    scores = rng.integers(0, 11, size=attempts) * 10.0
+    for lo in range(0, attempts, 50000):
+        db.execute(insert(Attempt), [
+            {"quiz_id": int(quiz_ids[i]), "user_id": int(user_ids[i]), "score": float(scores[i]),
+             "quiz_version_id": "f" * 64, "created_at": start + timedelta(seconds=int(offsets[i])),
+             "started_at": start + timedelta(seconds=int(offsets[i])),
+             "completed_at": start + timedelta(seconds=int(offsets[i]) + 300)}
+            for i in range(lo, min(lo + 50000, attempts))
+        ])
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--attempts", type=int, default=500000)
+    parser.add_argument("--quizzes", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--months", type=int, default=24)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'archive.db')}")
+    Base.metadata.create_all(engine)
+    archive = AttemptArchive(os.path.join(workdir, "archive"))
+    try:
+        with Session(engine) as db:
+            build(db, args.attempts, args.quizzes, args.users, args.months)
+            user_id, quiz_id = 7, 3
+
+            def table_history():
+                return db.execute(
+                    select(Attempt).where(Attempt.user_id == user_id)
+                    .order_by(Attempt.created_at.desc(), Attempt.id.desc())
+                ).all()
+
+            table_ms = timed(table_history)
+            table_stats_ms = timed(lambda: monthly_stats(db, quiz_id))
+            history_rows = len(table_history())
+
+            t0 = time.perf_counter()
+            archive_before(db, archive, date(2100, 1, 1), batch_size=5000)
+            elapsed = time.perf_counter() - t0
+            left = db.scalar(select(func.count()).select_from(Attempt))
+            size = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(archive.root) for name in names
+            )
+            print(f"archive job        {args.attempts / elapsed:10,.0f} attempts/s, {left} left in the table, "
+                  f"{size / args.attempts:.0f} bytes/attempt on disk")
+
+            archive_ms = timed(lambda: archive.user_attempts(user_id))
+            print(f"user history ({history_rows} rows)   table {table_ms:8.2f} ms   archive {archive_ms:8.2f} ms")
+
+            # keyset pages of 5, the last one should cost about the same as the first
+            oldest = archive.user_attempts(user_id)[-6]
+            first_ms = timed(lambda: archive.user_history(user_id, 5))
+            last_ms = timed(lambda: archive.user_history(user_id, 5, cursor=oldest["id"]))
+            print(f"history page of 5         first {first_ms:8.2f} ms   last {last_ms:8.2f} ms (cursor lookup)")
+
+            stats = [m for m in archive.quiz_stats(quiz_id)]
+            archive_stats_ms = timed(lambda: archive.quiz_stats(quiz_id))
+            print(f"quiz stats ({len(stats)} months)     table {table_stats_ms:8.2f} ms   "
+                  f"archive {archive_stats_ms:8.2f} ms")
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Cost of a one-word fix in a large quiz: diff patch vs delete and re-create.
+
+    python -m benchmarks.content_patch [--questions 5000] [--database-url sqlite://]
+
+Both paths include creating the new quiz version.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, delete, event, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.quiz import Choice, Question, Quiz
+from app.models.user import User
+from app.schemas.quiz import QuizContentPatch
+from app.services.content import apply_content_patch
+from app.services.versions import snapshot_quiz
+
+
+def build(db: Session, questions: int) -> int:
+    user = User(email="bench@test.com", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    quiz = Quiz(title="Bank", creator_id=user.id)
+    db.add(quiz)
+    db.flush()
+    ids = db.scalars(
+        insert(Question).returning(Question.id, sort_by_parameter_order=True),
+        [{"quiz_id": quiz.id, "text": f"Question {n}"} for n in range(questions)]
+    ).all()
+    db.execute(insert(Choice), [
+        {"question_id": qid, "text": f"choice {n}", "is_correct": n == 0} for qid in ids for n in range(4)
+    ])
+    snapshot_quiz(db, quiz)
+    db.commit()
+    return quiz.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=5000)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(1))
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        quiz_id = build(db, args.questions)
+        question_id = db.scalar(select(Question.id).where(Question.quiz_id == quiz_id).limit(1))
+
+        statements.clear()
+        t0 = time.perf_counter()
+        patch = QuizContentPatch(update_questions=[{"id": question_id, "text": "Question zero"}])
+        apply_content_patch(db, quiz_id, patch)
+        snapshot_quiz(db, db.get(Quiz, quiz_id))
+        db.commit()
+        print(f"diff patch            {(time.perf_counter() - t0) * 1000:8.1f} ms  {len(statements)} statements")
+
+        statements.clear()
+        t0 = time.perf_counter()
+        rows = db.execute(
+            select(Question.id, Question.text).where(Question.quiz_id == quiz_id)
+        ).all()
+        choices = {}
+        for c in db.execute(select(Choice.question_id, Choice.text, Choice.is_correct)):
+            choices.setdefault(c.question_id, []).append(c)
+        db.execute(delete(Choice))
+        db.execute(delete(Question).where(Question.quiz_id == quiz_id))
+        # same statements the create endpoint issues
+        for old_id, text in rows:
+            question = Question(quiz_id=quiz_id, text=text)
+            db.add(question)
+            db.flush()
+            for c in choices[old_id]:
+                db.add(Choice(question_id=question.id, text=c.text, is_correct=c.is_correct))
+        snapshot_quiz(db, db.get(Quiz, quiz_id))
+        db.commit()
+        print(f"delete and re-create  {(time.perf_counter() - t0) * 1000:8.1f} ms  {len(statements)} statements")
+
+    Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Cost and recall of the near-duplicate question index.
+
+    python -m benchmarks.dedup [--questions 100000] [--import-size 1000] [--threshold 0.8]
+
+Fills a scratch SQLite file with random questions, a share of them planted
+near-duplicates (case, punctuation or one word changed), indexes the bank,
+then times an import check and the whole-bank report. Recall counts planted
+pairs whose estimated similarity passes the threshold and that were found.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.jobs.dedup import backfill_index, duplicate_clusters
+from app.models.quiz import Question, QuestionBucket, Quiz
+from app.models.user import User
+from app.services.dedup import find_duplicates, signatures, similarity
+
+WORDS = [
+    "".join(chr(97 + c) for c in word)
+    for word in np.random.default_rng(1).integers(0, 26, size=(5000, 7)) % 26
+]
+
+
+def question(rng: np.random.Generator) -> str:
+    return " ".join(WORDS[i] for i in rng.integers(0, len(WORDS), size=rng.integers(8, 16))) + "?"
+
+
+def variant(rng: np.random.Generator, text: str) -> str:
+    words = text.rstrip("?").split()
+    kind = rng.integers(0, 3)
+    if kind == 0:
+        return text.upper()
+    if kind == 1:
+        return ", ".join(words) + "!"
+    words[rng.integers(0, len(words))] = WORDS[rng.integers(0, len(WORDS))]
+    return " ".join(words) + "?"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=100000)
+    parser.add_argument("--import-size", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    originals = [question(rng) for _ in range(args.questions * 9 // 10)]
+    planted = [(int(i), variant(rng, originals[i])) for i in rng.integers(0, len(originals), args.questions // 10)]
+    texts = originals + [text for _, text in planted]
+
+    t0 = time.perf_counter()
+    signatures(texts[:10000])
+    print(f"signatures        {10000 / (time.perf_counter() - t0):10,.0f} questions/s")
+
+    path = os.path.join(tempfile.mkdtemp(), "dedup.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    try:
+        with Session(engine) as db:
+            user = User(email="bench@test.com", username="bench", hashed_password="x")
+            db.add(user)
+            db.flush()
+            quiz = Quiz(title="Bank", creator_id=user.id)
+            db.add(quiz)
+            db.flush()
+            ids = db.scalars(
+                insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                [{"quiz_id": quiz.id, "text": text} for text in texts]
+            ).all()
+            db.commit()
+
+            t0 = time.perf_counter()
+            backfill_index(db, batch_size=5000)
+            elapsed = time.perf_counter() - t0
+            buckets = db.scalar(select(func.count()).select_from(QuestionBucket))
+            print(f"index backfill    {len(texts) / elapsed:10,.0f} questions/s   ({buckets:,} bucket rows)")
+
+            batch = [question(rng) for _ in range(args.import_size // 2)]
+            batch += [variant(rng, originals[i]) for i in rng.integers(0, len(originals), args.import_size - len(batch))]
+            t0 = time.perf_counter()
+            found = find_duplicates(db, batch, args.threshold)
+            elapsed = time.perf_counter() - t0
+            print(f"import check      {elapsed * 1000:10.1f} ms for {len(batch)} questions, "
+                  f"{sum(1 for m in found if m)} flagged")
+
+            t0 = time.perf_counter()
+            clusters = duplicate_clusters(db, args.threshold)
+            elapsed = time.perf_counter() - t0
+            print(f"bank report       {elapsed * 1000:10.1f} ms, {len(clusters)} clusters")
+
+            # planted pairs similar enough to count, and how many of them share a cluster
+            planted_sigs = signatures([text for _, text in planted])
+            source_sigs = signatures([originals[i] for i, _ in planted])
+            expected = [
+                (ids[i], ids[len(originals) + n]) for n, (i, _) in enumerate(planted)
+                if similarity(planted_sigs[n], source_sigs[n][None, :])[0] >= args.threshold
+            ]
+            cluster_of = {qid: c for c, cluster in enumerate(clusters) for qid in cluster}
+            hits = sum(1 for a, b in expected if a in cluster_of and cluster_of.get(a) == cluster_of.get(b))
+            print(f"recall            {hits / max(len(expected), 1):10.1%} of {len(expected)} planted pairs "
+                  f"above {args.threshold}")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
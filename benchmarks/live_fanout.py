@@ -0,0 +1,118 @@
+"""
+Fan-out cost of a live session with many players in one process.
+
+    python -m benchmarks.live_fanout [--players 10000] [--questions 10]
+
+Sockets are in-process fakes (send_text only counts), so this measures the
+session layer itself: per-socket queues, sender tasks, scoring and leaderboard.
+Kernel/network cost of real sockets comes on top.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from app.services.live import LivePlayer, LiveSession
+from app.services.versions import VersionRules
+
+
+class FakeSocket:
+    delivered = 0
+    target = 0
+    done: asyncio.Event = None
+
+    async def send_text(self, text: str) -> None:
+        FakeSocket.delivered += 1
+        if FakeSocket.delivered >= FakeSocket.target:
+            FakeSocket.done.set()
+
+    async def close(self) -> None:
+        pass
+
+
+def fake_version(questions: int) -> SimpleNamespace:
+    choice_id = 0
+    items = []
+    for question_id in range(1, questions + 1):
+        choices = []
+        for n in range(4):
+            choice_id += 1
+            choices.append({"id": choice_id, "text": f"choice {n}", "is_correct": n == 0})
+        items.append({"id": question_id, "text": f"question {question_id}", "choices": choices})
+    return SimpleNamespace(id=None, quiz_id=1, content={"questions": items})
+
+
+def fake_rules(version: SimpleNamespace) -> VersionRules:
+    answer_key = {
+        question["id"]: {c["id"] for c in question["choices"] if c["is_correct"]}
+        for question in version.content["questions"]
+    }
+    return VersionRules(time_limit=None, answer_key=answer_key)
+
+
+async def run(players: int, questions: int) -> None:
+    version = fake_version(questions)
+    session = LiveSession(
+        "BENCH1", version, fake_rules(version), host_id=0, question_seconds=0, reveal_seconds=0
+    )
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for user_id in range(1, players + 1):
+        session.join(LivePlayer(user_id, f"player{user_id}", FakeSocket()))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{players} players joined, {(after - before) / players / 1024:.2f} KiB per player")
+
+    session.state = "question"
+    enqueue, deliver, scoring, ranking = [], [], [], []
+    for question in session.questions:
+        session.current_question_id = question["id"]
+        session._answers_in = 0
+
+        FakeSocket.delivered = 0
+        FakeSocket.target = players
+        FakeSocket.done = asyncio.Event()
+
+        t0 = time.perf_counter()
+        session.broadcast({"type": "question", "question": question})
+        t1 = time.perf_counter()
+        await FakeSocket.done.wait()
+        t2 = time.perf_counter()
+        enqueue.append((t1 - t0) * 1000)
+        deliver.append((t2 - t0) * 1000)
+
+        choice_ids = [c["id"] for c in question["choices"]]
+        t0 = time.perf_counter()
+        for user_id in range(1, players + 1):
+            session.submit_answer(user_id, question["id"], random.choice(choice_ids))
+        scoring.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        session.leaderboard()
+        ranking.append((time.perf_counter() - t0) * 1000)
+
+    def report(name, values):
+        print(f"{name:<28} median {statistics.median(values):7.2f} ms   max {max(values):7.2f} ms")
+
+    report("broadcast enqueue", enqueue)
+    report("broadcast delivered to all", deliver)
+    report(f"score {players} answers", scoring)
+    report("top-10 leaderboard", ranking)
+
+    await session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.players, args.questions))
+
+
+if __name__ == "__main__":
+    main()
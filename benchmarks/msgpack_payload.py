@@ -0,0 +1,90 @@
+"""
+Payload size and encode/decode time of JSON vs MessagePack responses.
+
+    python -m benchmarks.msgpack_payload [--quizzes 50] [--questions 40] [--attempts 1000]
+
+Server encode times follow app/api/msgpack.py: JSON is pydantic's dump_json,
+msgpack is dump_json + json.loads + msgpack.packb.
+"""
+import argparse
+import json
+import statistics
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, List
+
+import msgpack
+from pydantic import TypeAdapter
+
+from app.schemas.quiz import AttemptResponse, QuizResponse
+
+
+def quiz_payload(quizzes: int, questions: int) -> List[dict]:
+    choice_id = question_id = 0
+    result = []
+    for quiz_id in range(1, quizzes + 1):
+        items = []
+        for _ in range(questions):
+            question_id += 1
+            choices = []
+            for n in range(4):
+                choice_id += 1
+                choices.append({"id": choice_id, "text": f"Answer option number {n}", "is_correct": n == 0})
+            items.append({"id": question_id, "text": f"What is the result of question {question_id}?", "choices": choices})
+        result.append({
+            "id": quiz_id, "title": f"Quiz {quiz_id}", "description": "Generated for benchmarking",
+            "creator_id": 1, "category_id": 1, "time_limit": 600, "questions": items,
+        })
+    return result
+
+
+def attempt_payload(attempts: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {"id": i, "quiz_id": i % 50, "user_id": 1, "score": 75.0,
+         "created_at": now, "started_at": now, "completed_at": now}
+        for i in range(1, attempts + 1)
+    ]
+
+
+def timed(fn: Callable, repeat: int = 20) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs)
+
+
+def compare(name: str, adapter: TypeAdapter, data: list) -> None:
+    models = adapter.validate_python(data)
+    json_body = adapter.dump_json(models)
+    packed_body = msgpack.packb(json.loads(json_body), use_bin_type=True)
+
+    print(f"\n{name}")
+    print(f"  size       json {len(json_body) / 1024:9.1f} KiB   msgpack {len(packed_body) / 1024:9.1f} KiB"
+          f"   ({len(packed_body) / len(json_body):.0%})")
+    print(f"  gzip -6    json {len(zlib.compress(json_body, 6)) / 1024:9.1f} KiB"
+          f"   msgpack {len(zlib.compress(packed_body, 6)) / 1024:9.1f} KiB")
+    print(f"  encode     json {timed(lambda: adapter.dump_json(models)):9.2f} ms"
+          f"    msgpack {timed(lambda: msgpack.packb(json.loads(adapter.dump_json(models)), use_bin_type=True)):9.2f} ms")
+    print(f"  decode     json {timed(lambda: json.loads(json_body)):9.2f} ms"
+          f"    msgpack {timed(lambda: msgpack.unpackb(packed_body)):9.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quizzes", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--attempts", type=int, default=1000)
+    args = parser.parse_args()
+
+    compare(f"{args.quizzes} x QuizResponse ({args.questions} questions, 4 choices)",
+            TypeAdapter(List[QuizResponse]), quiz_payload(args.quizzes, args.questions))
+    compare(f"{args.attempts} x AttemptResponse",
+            TypeAdapter(List[AttemptResponse]), attempt_payload(args.attempts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-request Python overhead of the hot-path lookups, before and after app/db/queries.py.
+
+    python -m benchmarks.query_overhead [--requests 5000] [--database-url sqlite://]
+
+"before" rebuilds the same lookups with session.query() on every call, as the
+endpoints did; "after" executes the prebuilt statements. With in-memory SQLite
+the database work is negligible, so the difference is SQLAlchemy-side
+construction and cache-key generation.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import queries
+from app.db.base import Base
+from app.models.quiz import Attempt, Quiz, SubmissionReceipt
+from app.models.user import User
+
+
+def before_submit(db: Session, email: str, quiz_id: int, attempt_id: int) -> None:
+    user = db.query(User).filter(User.email == email).first()
+    db.query(SubmissionReceipt).filter(
+        SubmissionReceipt.user_id == user.id,
+        SubmissionReceipt.attempt_id == attempt_id,
+        SubmissionReceipt.idempotency_key == "key"
+    ).first()
+    db.query(Attempt).filter(
+        Attempt.id == attempt_id, Attempt.user_id == user.id, Attempt.quiz_id == quiz_id
+    ).first()
+    db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.deleted_at.is_(None)).first()
+
+
+def after_submit(db: Session, email: str, quiz_id: int, attempt_id: int) -> None:
+    user = queries.user_by_email(db, email)
+    queries.submission_receipt(db, user.id, attempt_id, "key")
+    queries.user_attempt(db, attempt_id, user.id, quiz_id)
+    queries.active_quiz(db, quiz_id)
+
+
+def before_get_quiz(db: Session, quiz_id: int) -> None:
+    quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.deleted_at.is_(None)).first()
+    quiz.version_id
+
+
+def after_get_quiz(db: Session, quiz_id: int) -> None:
+    queries.active_quiz_version(db, quiz_id).version_id
+
+
+def measure(fn, requests: int, rounds: int = 5) -> float:
+    fn()
+    results = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(requests):
+            fn()
+        results.append((time.perf_counter() - t0) / requests * 1e6)
+    return statistics.median(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        user = User(email="bench@test.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.flush()
+        quiz = Quiz(title="Bench", creator_id=user.id, version_id="0" * 64)
+        db.add(quiz)
+        db.flush()
+        attempt = Attempt(user_id=user.id, quiz_id=quiz.id, score=0.0)
+        db.add(attempt)
+        db.commit()
+        ids = (user.email, quiz.id, attempt.id)
+
+        for name, before, after in [
+            ("submit_quiz lookups (4)", lambda: before_submit(db, *ids), lambda: after_submit(db, *ids)),
+            ("get_quiz_by_id lookup", lambda: before_get_quiz(db, ids[1]), lambda: after_get_quiz(db, ids[1])),
+        ]:
+            b, a = measure(before, args.requests), measure(after, args.requests)
+            print(f"{name:<26} before {b:7.1f} us   after {a:7.1f} us   ({a / b:.0%})")
+
+    Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Throughput of the chunked re-grade job.
+
+    python -m benchmarks.regrade [--attempts 100000] [--questions 10] [--chunk-size 5000]
+
+Builds one quiz with recorded answers in a scratch SQLite file, flips the
+answer key of one question and times a full re-grade.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.jobs.regrade import create_regrade_job, run_regrade_job
+from app.models.quiz import Attempt, AttemptAnswer, Choice, Question, Quiz
+from app.models.user import User
+from app.schemas.quiz import QuizContentPatch
+from app.services.content import apply_content_patch
+from app.services.versions import snapshot_quiz
+
+
+def build(db: Session, attempts: int, questions: int) -> int:
+    rng = np.random.default_rng(3)
+    user = User(email="bench@test.com", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    quiz = Quiz(title="Popular", creator_id=user.id)
+    db.add(quiz)
+    db.flush()
+    question_ids = db.scalars(
+        insert(Question).returning(Question.id, sort_by_parameter_order=True),
+        [{"quiz_id": quiz.id, "text": f"Question {n}"} for n in range(questions)]
+    ).all()
+    choice_ids = np.array(db.scalars(
+        insert(Choice).returning(Choice.id, sort_by_parameter_order=True),
+        [{"question_id": qid, "text": f"choice {n}", "is_correct": n == 0} for qid in question_ids for n in range(4)]
+    ).all()).reshape(questions, 4)
+    version_id = snapshot_quiz(db, quiz)
+
+    now = datetime.now(timezone.utc)
+    attempt_ids = db.scalars(
+        insert(Attempt).returning(Attempt.id, sort_by_parameter_order=True),
+        [{"user_id": user.id, "quiz_id": quiz.id, "quiz_version_id": version_id, "score": 0.0,
+          "completed_at": now} for _ in range(attempts)]
+    ).all()
+
+    picks = rng.integers(0, 4, size=(attempts, questions))
+    db.execute(insert(AttemptAnswer), [
+        {"attempt_id": attempt_id, "question_id": question_ids[q], "choice_id": int(choice_ids[q, picks[a, q]]),
+         "is_correct": bool(picks[a, q] == 0)}
+        for a, attempt_id in enumerate(attempt_ids) for q in range(questions)
+    ])
+
+    # the first question's key was wrong, choice 1 is the right one
+    apply_content_patch(db, quiz.id, QuizContentPatch(update_questions=[{
+        "id": question_ids[0], "update_choices": [
+            {"id": int(choice_ids[0, 0]), "is_correct": False}, {"id": int(choice_ids[0, 1]), "is_correct": True}
+        ]
+    }]))
+    snapshot_quiz(db, quiz)
+    db.commit()
+    return quiz.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--attempts", type=int, default=100000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "regrade.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    try:
+        with Session(engine) as db:
+            quiz_id = build(db, args.attempts, args.questions)
+            quiz = db.get(Quiz, quiz_id)
+            job = create_regrade_job(db, quiz_id, quiz.version_id)
+
+            t0 = time.perf_counter()
+            job = run_regrade_job(db, job.id, args.chunk_size)
+            elapsed = time.perf_counter() - t0
+            print(f"re-graded {job.processed} attempts ({job.changed} changed) in {elapsed:.2f} s, "
+                  f"{job.processed / elapsed:,.0f} attempts/s")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
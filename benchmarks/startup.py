@@ -0,0 +1,120 @@
+"""
+Startup time and per-worker memory of the API.
+
+    python -m benchmarks.startup [--runs 10] [--workers 4]
+
+1. import + create_app() in a fresh interpreter (median of --runs)
+2. gunicorn with and without --preload: RSS and USS (private memory) per worker
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLD_START = """
+import time
+t0 = time.perf_counter()
+from app.main import create_app
+app = create_app()
+t1 = time.perf_counter()
+rss = [l for l in open('/proc/self/status') if l.startswith('VmRSS')][0].split()[1]
+print(f"{(t1 - t0) * 1000:.2f} {rss}")
+"""
+
+
+def bench_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./bench_startup.db")
+    env.setdefault("SECRET_KEY", "bench")
+    return env
+
+
+def cold_start(runs: int) -> None:
+    times, rss = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_START], cwd=ROOT, env=bench_env(),
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        times.append(float(out[0]))
+        rss.append(int(out[1]))
+    print(f"import + create_app: median {statistics.median(times):.1f} ms, "
+          f"min {min(times):.1f} ms, RSS {statistics.median(rss) / 1024:.1f} MiB")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory_kib(pid: int) -> tuple:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), uss
+
+
+def worker_memory(workers: int, preload: bool) -> None:
+    port = free_port()
+    cmd = [
+        sys.executable, "-m", "gunicorn", "app.main:create_app()",
+        "-k", "uvicorn_worker.UvicornWorker", "-w", str(workers),
+        "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+    ]
+    if preload:
+        cmd.append("--preload")
+
+    started = time.perf_counter()
+    master = subprocess.Popen(cmd, cwd=ROOT, env=bench_env())
+    try:
+        # ready once every worker answered at least once
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.05)
+        ready_ms = (time.perf_counter() - started) * 1000
+        for _ in range(workers * 20):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+
+        children = subprocess.run(
+            ["pgrep", "-P", str(master.pid)], capture_output=True, text=True
+        ).stdout.split()
+        stats = [memory_kib(int(pid)) for pid in children]
+        rss = statistics.mean(s[0] for s in stats) / 1024
+        uss = statistics.mean(s[1] for s in stats) / 1024
+        label = "preload" if preload else "no preload"
+        print(f"gunicorn {label:>10}: first response {ready_ms:.0f} ms, "
+              f"{len(stats)} workers, RSS {rss:.1f} MiB, USS {uss:.1f} MiB per worker")
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    cold_start(args.runs)
+    worker_memory(args.workers, preload=False)
+    worker_memory(args.workers, preload=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# gunicorn -c gunicorn.conf.py "app.main:create_app()"
+import multiprocessing
+import os
+
+from app.core.config import get_settings
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# live sessions live in one process's memory, a second worker would never see them
+if get_settings().live_enabled:
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers != 1:
+        raise RuntimeError("LIVE_ENABLED needs WEB_CONCURRENCY=1, run live sessions as their own service")
+else:
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# import the app once in the master, workers share that memory copy-on-write
+preload_app = True
+
+
+def post_fork(server, worker):
+    # never reuse a pool that was opened before the fork
+    from app.db.session import dispose_engine
+    dispose_engine()
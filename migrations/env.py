@@ -12,6 +12,7 @@ load_dotenv()
 sys.path.insert(0, dirname(dirname(abspath(__file__))))
 
 from app.db.base import Base
+from app.db.session import engine_url
 from app.models.user import User 
 
 config = context.config
@@ -44,7 +45,7 @@ def run_migrations_online() -> None:
 
     # connect through url
     connectable = create_engine(
-        db_url, 
+        engine_url(db_url), 
         poolclass=pool.NullPool,
         connect_args={"client_encoding": "utf8"})
 
@@ -0,0 +1,55 @@
+"""Add attempt summaries
+
+Revision ID: 0b8e6f3a2c95
+Revises: f2a7d1c8b463
+Create Date: 2026-10-19 21:03:41.772690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b8e6f3a2c95'
+down_revision: Union[str, Sequence[str], None] = 'f2a7d1c8b463'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attempt_summaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('best_score', sa.Float(), nullable=False),
+    sa.Column('last_score', sa.Float(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('last_attempt_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'quiz_id')
+    )
+    op.create_index(op.f('ix_attempt_summaries_quiz_id'), 'attempt_summaries', ['quiz_id'], unique=False)
+
+    # backfill from existing finished attempts
+    op.execute("""
+        INSERT INTO attempt_summaries
+            (user_id, quiz_id, attempt_count, best_score, last_score, score_sum, last_attempt_at)
+        SELECT a.user_id, a.quiz_id, count(*), max(a.score),
+               (SELECT l.score FROM attempts l
+                WHERE l.user_id = a.user_id AND l.quiz_id = a.quiz_id AND l.completed_at IS NOT NULL
+                ORDER BY l.completed_at DESC, l.id DESC LIMIT 1),
+               sum(a.score), max(a.completed_at)
+        FROM attempts a
+        WHERE a.completed_at IS NOT NULL AND a.user_id IS NOT NULL AND a.quiz_id IS NOT NULL
+        GROUP BY a.user_id, a.quiz_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attempt_summaries_quiz_id'), table_name='attempt_summaries')
+    op.drop_table('attempt_summaries')
@@ -0,0 +1,43 @@
+"""Add question dedup index
+
+Revision ID: 3c7e9a1f5b28
+Revises: 0b8e6f3a2c95
+Create Date: 2026-10-19 22:18:05.413927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e9a1f5b28'
+down_revision: Union[str, Sequence[str], None] = '0b8e6f3a2c95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('question_signatures',
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('signature', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('question_id')
+    )
+    op.create_table('question_lsh_buckets',
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('bucket', 'question_id')
+    )
+    op.create_index(op.f('ix_question_lsh_buckets_question_id'), 'question_lsh_buckets', ['question_id'], unique=False)
+    # existing questions are indexed by python -m app.jobs.dedup index
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_question_lsh_buckets_question_id'), table_name='question_lsh_buckets')
+    op.drop_table('question_lsh_buckets')
+    op.drop_table('question_signatures')
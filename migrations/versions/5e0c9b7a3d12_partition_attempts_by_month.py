@@ -0,0 +1,118 @@
+"""Partition attempts by month
+
+Revision ID: 5e0c9b7a3d12
+Revises: c4a81f2d9e61
+Create Date: 2026-10-19 13:41:05.502361
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0c9b7a3d12'
+down_revision: Union[str, Sequence[str], None] = 'c4a81f2d9e61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# months pre-created after the current one, app/db/partitions.py keeps this rolling
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, user_id, quiz_id, score, created_at, started_at, completed_at"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # a partitioned table can not be the target of a FK on id alone
+    op.drop_constraint('submission_receipts_attempt_id_fkey', 'submission_receipts', type_='foreignkey')
+
+    op.execute("ALTER TABLE attempts RENAME TO attempts_unpartitioned")
+    op.execute("ALTER TABLE attempts_unpartitioned RENAME CONSTRAINT attempts_pkey TO attempts_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_attempts_id RENAME TO ix_attempts_unpartitioned_id")
+    # keep the id sequence alive when the old table is dropped
+    op.execute("ALTER SEQUENCE attempts_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE attempts (
+            id integer NOT NULL DEFAULT nextval('attempts_id_seq'),
+            user_id integer REFERENCES users (id),
+            quiz_id integer REFERENCES quizzes (id),
+            score double precision,
+            created_at timestamp with time zone NOT NULL DEFAULT now(),
+            started_at timestamp with time zone DEFAULT now(),
+            completed_at timestamp with time zone,
+            CONSTRAINT attempts_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index(op.f('ix_attempts_id'), 'attempts', ['id'], unique=False)
+    op.create_index('ix_attempts_user_id_created_at', 'attempts', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_attempts_quiz_id_score', 'attempts', ['quiz_id', 'score'], unique=False)
+    op.execute("CREATE TABLE attempts_default PARTITION OF attempts DEFAULT")
+
+    # one partition per month from the oldest attempt up to a few months ahead
+    today = date.today().replace(day=1)
+    oldest = bind.execute(sa.text(
+        "SELECT min(created_at) FROM attempts_unpartitioned"
+    )).scalar()
+    month = date(oldest.year, oldest.month, 1) if oldest else today
+    last = _add_months(today, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE attempts_p{month.year:04d}{month.month:02d} PARTITION OF attempts "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute(
+        f"INSERT INTO attempts ({COLUMNS}) "
+        f"SELECT id, user_id, quiz_id, score, coalesce(created_at, started_at, now()), started_at, completed_at "
+        f"FROM attempts_unpartitioned"
+    )
+    op.execute("DROP TABLE attempts_unpartitioned")
+    op.execute("ALTER SEQUENCE attempts_id_seq OWNED BY attempts.id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE attempts RENAME TO attempts_partitioned")
+    op.execute("ALTER TABLE attempts_partitioned RENAME CONSTRAINT attempts_pkey TO attempts_partitioned_pkey")
+    op.execute("ALTER INDEX ix_attempts_id RENAME TO ix_attempts_partitioned_id")
+    op.execute("DROP INDEX ix_attempts_user_id_created_at")
+    op.execute("DROP INDEX ix_attempts_quiz_id_score")
+    op.execute("ALTER SEQUENCE attempts_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE attempts (
+            id integer NOT NULL DEFAULT nextval('attempts_id_seq'),
+            user_id integer REFERENCES users (id),
+            quiz_id integer REFERENCES quizzes (id),
+            score double precision,
+            created_at timestamp with time zone DEFAULT now(),
+            started_at timestamp with time zone DEFAULT now(),
+            completed_at timestamp with time zone,
+            CONSTRAINT attempts_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.create_index(op.f('ix_attempts_id'), 'attempts', ['id'], unique=False)
+    op.execute(f"INSERT INTO attempts ({COLUMNS}) SELECT {COLUMNS} FROM attempts_partitioned")
+    op.execute("DROP TABLE attempts_partitioned CASCADE")
+    op.execute("ALTER SEQUENCE attempts_id_seq OWNED BY attempts.id")
+
+    op.create_foreign_key('submission_receipts_attempt_id_fkey', 'submission_receipts', 'attempts', ['attempt_id'], ['id'])
@@ -0,0 +1,29 @@
+"""Index submission receipts by attempt
+
+Revision ID: 6a1e8c3f9d24
+Revises: 3c7e9a1f5b28
+Create Date: 2026-10-20 10:12:41.208316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1e8c3f9d24'
+down_revision: Union[str, Sequence[str], None] = '3c7e9a1f5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the unique key leads with user_id and cannot serve attempt_id IN (...)
+    op.create_index(op.f('ix_submission_receipts_attempt_id'), 'submission_receipts', ['attempt_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_submission_receipts_attempt_id'), table_name='submission_receipts')
@@ -0,0 +1,63 @@
+"""Add adaptive testing
+
+Revision ID: 7d2f4e8a1b30
+Revises: 5e0c9b7a3d12
+Create Date: 2026-10-19 15:41:07.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f4e8a1b30'
+down_revision: Union[str, Sequence[str], None] = '5e0c9b7a3d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quizzes', sa.Column('is_adaptive', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('quizzes', sa.Column('calibrated_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('questions', sa.Column('discrimination', sa.Float(), server_default='1.0', nullable=False))
+    op.add_column('questions', sa.Column('difficulty', sa.Float(), server_default='0.0', nullable=False))
+
+    op.create_table('attempt_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('attempt_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('choice_id', sa.Integer(), nullable=True),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_attempt_answers_id'), 'attempt_answers', ['id'], unique=False)
+    op.create_index(op.f('ix_attempt_answers_attempt_id'), 'attempt_answers', ['attempt_id'], unique=False)
+    op.create_index(op.f('ix_attempt_answers_question_id'), 'attempt_answers', ['question_id'], unique=False)
+
+    op.create_table('adaptive_states',
+    sa.Column('attempt_id', sa.Integer(), nullable=False),
+    sa.Column('log_posterior', sa.LargeBinary(), nullable=False),
+    sa.Column('ability', sa.Float(), nullable=False),
+    sa.Column('ability_se', sa.Float(), nullable=False),
+    sa.Column('items_administered', sa.Integer(), nullable=False),
+    sa.Column('current_question_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('attempt_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('adaptive_states')
+    op.drop_index(op.f('ix_attempt_answers_question_id'), table_name='attempt_answers')
+    op.drop_index(op.f('ix_attempt_answers_attempt_id'), table_name='attempt_answers')
+    op.drop_index(op.f('ix_attempt_answers_id'), table_name='attempt_answers')
+    op.drop_table('attempt_answers')
+    op.drop_column('questions', 'difficulty')
+    op.drop_column('questions', 'discrimination')
+    op.drop_column('quizzes', 'calibrated_at')
+    op.drop_column('quizzes', 'is_adaptive')
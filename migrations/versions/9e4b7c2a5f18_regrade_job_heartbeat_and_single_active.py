@@ -0,0 +1,42 @@
+"""Regrade job heartbeat and one active job per quiz
+
+Revision ID: 9e4b7c2a5f18
+Revises: 6a1e8c3f9d24
+Create Date: 2026-10-20 11:03:27.551094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7c2a5f18'
+down_revision: Union[str, Sequence[str], None] = '6a1e8c3f9d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('regrade_jobs', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    # only the newest active job of a quiz survives, older ones could not finish safely next to it
+    op.execute("""
+        UPDATE regrade_jobs SET status = 'failed', error = 'Superseded by a newer job'
+        WHERE status IN ('pending', 'running') AND EXISTS (
+            SELECT 1 FROM regrade_jobs newer
+            WHERE newer.quiz_id = regrade_jobs.quiz_id AND newer.id > regrade_jobs.id
+              AND newer.status IN ('pending', 'running')
+        )
+    """)
+    op.create_index(
+        'uq_regrade_jobs_active_quiz', 'regrade_jobs', ['quiz_id'], unique=True,
+        postgresql_where=sa.text("status IN ('pending', 'running')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_regrade_jobs_active_quiz', table_name='regrade_jobs')
+    op.drop_column('regrade_jobs', 'updated_at')
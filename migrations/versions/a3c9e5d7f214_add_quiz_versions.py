@@ -0,0 +1,42 @@
+"""Add quiz versions
+
+Revision ID: a3c9e5d7f214
+Revises: 7d2f4e8a1b30
+Create Date: 2026-10-19 17:08:52.330671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5d7f214'
+down_revision: Union[str, Sequence[str], None] = '7d2f4e8a1b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('quiz_versions',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_quiz_versions_quiz_id'), 'quiz_versions', ['quiz_id'], unique=False)
+    # existing quizzes get their first version on next read
+    op.add_column('quizzes', sa.Column('version_id', sa.String(length=64), nullable=True))
+    op.add_column('attempts', sa.Column('quiz_version_id', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('attempts', 'quiz_version_id')
+    op.drop_column('quizzes', 'version_id')
+    op.drop_index(op.f('ix_quiz_versions_quiz_id'), table_name='quiz_versions')
+    op.drop_table('quiz_versions')
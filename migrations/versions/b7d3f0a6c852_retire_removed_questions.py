@@ -0,0 +1,35 @@
+"""Retire removed questions instead of deleting their answers
+
+Revision ID: b7d3f0a6c852
+Revises: 9e4b7c2a5f18
+Create Date: 2026-10-20 14:26:09.734512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3f0a6c852'
+down_revision: Union[str, Sequence[str], None] = '9e4b7c2a5f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('questions', sa.Column('removed_at', sa.DateTime(timezone=True), nullable=True))
+    # recorded answers must survive their question, the purge job deletes them first
+    op.drop_constraint('attempt_answers_question_id_fkey', 'attempt_answers', type_='foreignkey')
+    op.create_foreign_key('attempt_answers_question_id_fkey', 'attempt_answers', 'questions', ['question_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('attempt_answers_question_id_fkey', 'attempt_answers', type_='foreignkey')
+    op.create_foreign_key(
+        'attempt_answers_question_id_fkey', 'attempt_answers', 'questions', ['question_id'], ['id'], ondelete='CASCADE'
+    )
+    op.drop_column('questions', 'removed_at')
@@ -0,0 +1,52 @@
+"""Quiz soft delete and ON DELETE CASCADE
+
+Revision ID: e61b0c4d9a57
+Revises: a3c9e5d7f214
+Create Date: 2026-10-19 18:20:14.961302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e61b0c4d9a57'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e5d7f214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (constraint, table, column, referred table)
+CASCADING_FKS = [
+    ('questions_quiz_id_fkey', 'questions', 'quiz_id', 'quizzes'),
+    ('choices_question_id_fkey', 'choices', 'question_id', 'questions'),
+    ('attempts_quiz_id_fkey', 'attempts', 'quiz_id', 'quizzes'),
+    ('attempt_answers_question_id_fkey', 'attempt_answers', 'question_id', 'questions'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quizzes', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_quizzes_deleted_at'), 'quizzes', ['deleted_at'], unique=False)
+
+    # the purge job looks children up by parent id
+    op.create_index(op.f('ix_questions_quiz_id'), 'questions', ['quiz_id'], unique=False)
+    op.create_index(op.f('ix_choices_question_id'), 'choices', ['question_id'], unique=False)
+
+    for name, table, column, referred in CASCADING_FKS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, column, referred in CASCADING_FKS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'])
+
+    op.drop_index(op.f('ix_choices_question_id'), table_name='choices')
+    op.drop_index(op.f('ix_questions_quiz_id'), table_name='questions')
+    op.drop_index(op.f('ix_quizzes_deleted_at'), table_name='quizzes')
+    op.drop_column('quizzes', 'deleted_at')
@@ -0,0 +1,48 @@
+"""Add regrade jobs
+
+Revision ID: f2a7d1c8b463
+Revises: e61b0c4d9a57
+Create Date: 2026-10-19 19:47:33.108254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7d1c8b463'
+down_revision: Union[str, Sequence[str], None] = 'e61b0c4d9a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('regrade_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('version_id', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('changed', sa.Integer(), nullable=False),
+    sa.Column('last_attempt_id', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_regrade_jobs_id'), 'regrade_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_regrade_jobs_quiz_id'), 'regrade_jobs', ['quiz_id'], unique=False)
+    op.create_index('ix_attempts_quiz_id_id', 'attempts', ['quiz_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attempts_quiz_id_id', table_name='attempts')
+    op.drop_index(op.f('ix_regrade_jobs_quiz_id'), table_name='regrade_jobs')
+    op.drop_index(op.f('ix_regrade_jobs_id'), table_name='regrade_jobs')
+    op.drop_table('regrade_jobs')
@@ -1,14 +1,28 @@
+from contextlib import nullcontext
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.core.cache import quiz_payloads
+from app.core.config import Settings
 from app.db.base_class import Base
-from app.db.session import get_db
-from app.main import app
+from app.db.session import get_db, get_session_factory
+from app.main import create_app
+from app.services.adaptive import item_pools
 
 # use sqlite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.db"
 
+# purge and re-grade jobs run in the tests themselves, background tasks would need their own connection
+app = create_app(Settings(
+    database_url=SQLALCHEMY_DATABASE_URL,
+    secret_key="test-secret-key",
+    live_enabled=True,
+    purge_on_delete=False,
+    regrade_in_background=False
+))
+
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -42,5 +56,35 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    # websockets open short sessions of their own, hand them the test session without closing it
+    app.dependency_overrides[get_session_factory] = lambda: lambda: nullcontext(db)
+    # ids are reused after each rollback, cached payloads must not leak between tests
+    quiz_payloads.clear()
+    item_pools.clear()
     with TestClient(app) as c:
-        yield c
\ No newline at end of file
+        yield c
+
+@pytest.fixture
+def auth_headers(client):
+    """register and login a user, return bearer headers"""
+    client.post("/users/", json={"email": "player@test.com", "username": "player", "password": "password"})
+    login_res = client.post("/auth/login", data={"username": "player@test.com", "password": "password"})
+    return {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+
+@pytest.fixture
+def quiz(client, auth_headers):
+    """create a one-question quiz owned by the auth_headers user"""
+    quiz_data = {
+        "title": "Fixture Quiz",
+        "questions": [
+            {
+                "text": "2 + 2?",
+                "choices": [
+                    {"text": "4", "is_correct": True},
+                    {"text": "5", "is_correct": False}
+                ]
+            }
+        ]
+    }
+    return client.post("/quizzes/", json=quiz_data, headers=auth_headers).json()
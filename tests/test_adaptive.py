@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import update
+
+from app.models.quiz import Attempt
+from app.services import irt
+
+
+def test_adaptive_attempt_flow(client, auth_headers):
+    quiz_data = {
+        "title": "Adaptive Quiz",
+        "is_adaptive": True,
+        "questions": [
+            {
+                "text": f"{n} + {n}?",
+                "choices": [
+                    {"text": str(2 * n), "is_correct": True},
+                    {"text": str(2 * n + 1), "is_correct": False}
+                ]
+            }
+            for n in range(3)
+        ]
+    }
+    quiz = client.post("/quizzes/", json=quiz_data, headers=auth_headers).json()
+    correct = {q["id"]: [c["id"] for c in q["choices"] if c["is_correct"]][0] for q in quiz["questions"]}
+    attempt = client.post(f"/quizzes/{quiz['id']}/start", headers=auth_headers).json()
+    url = f"/quizzes/{quiz['id']}/adaptive/{attempt['id']}/next-question"
+
+    # fixed-form submit is refused for adaptive quizzes
+    submit_res = client.post(f"/quizzes/{quiz['id']}/submit/{attempt['id']}", json={"answers": []}, headers=auth_headers)
+    assert submit_res.status_code == 400
+
+    step = client.post(url, json={}, headers=auth_headers).json()
+    assert step["items_administered"] == 0
+    assert "is_correct" not in step["question"]["choices"][0]
+    # asking again without an answer returns the same question
+    assert client.post(url, json={}, headers=auth_headers).json()["question"] == step["question"]
+
+    seen = []
+    while not step["finished"]:
+        question_id = step["question"]["id"]
+        seen.append(question_id)
+        answer = {"question_id": question_id, "choice_id": correct[question_id]}
+        previous = step
+        step = client.post(url, json={"answer": answer}, headers=auth_headers).json()
+        assert step["ability"] > previous["ability"]
+
+    # pool of three is exhausted, every item asked once
+    assert sorted(seen) == sorted(correct)
+    assert step["score"] > 50
+    assert client.post(url, json={"answer": answer}, headers=auth_headers).status_code == 400
+
+    attempts = client.get("/quizzes/my-attempts", headers=auth_headers).json()
+    assert attempts[0]["completed_at"] is not None
+
+
+def test_removed_current_question_is_replaced(client, auth_headers):
+    quiz_data = {
+        "title": "Adaptive Quiz",
+        "is_adaptive": True,
+        "questions": [
+            {"text": f"{n}?", "choices": [{"text": "yes", "is_correct": True}, {"text": "no", "is_correct": False}]}
+            for n in range(2)
+        ]
+    }
+    quiz = client.post("/quizzes/", json=quiz_data, headers=auth_headers).json()
+    attempt = client.post(f"/quizzes/{quiz['id']}/start", headers=auth_headers).json()
+    url = f"/quizzes/{quiz['id']}/adaptive/{attempt['id']}/next-question"
+    shown = client.post(url, json={}, headers=auth_headers).json()["question"]
+
+    patch = {"remove_questions": [shown["id"]]}
+    assert client.patch(f"/quizzes/{quiz['id']}/content", json=patch, headers=auth_headers).status_code == 200
+
+    answer = {"question_id": shown["id"], "choice_id": shown["choices"][0]["id"]}
+    assert client.post(url, json={"answer": answer}, headers=auth_headers).status_code == 409
+    step = client.post(url, json={}, headers=auth_headers).json()
+    assert step["question"]["id"] != shown["id"]
+    assert not step["finished"]
+
+
+def test_adaptive_answers_are_scored_against_the_pinned_version(client, db, auth_headers):
+    quiz_data = {
+        "title": "Adaptive Quiz",
+        "is_adaptive": True,
+        "time_limit": 60,
+        "questions": [
+            {"text": f"{n}?", "choices": [{"text": "yes", "is_correct": True}, {"text": "no", "is_correct": False}]}
+            for n in range(3)
+        ]
+    }
+    quiz = client.post("/quizzes/", json=quiz_data, headers=auth_headers).json()
+    url = f"/quizzes/{quiz['id']}"
+    attempt = client.post(f"{url}/start", headers=auth_headers).json()
+    step_url = f"{url}/adaptive/{attempt['id']}/next-question"
+    shown = client.post(step_url, json={}, headers=auth_headers).json()
+
+    # the key is flipped after the attempt started, the pinned one still counts
+    yes, no = shown["question"]["choices"]
+    flip = {"update_questions": [{"id": shown["question"]["id"], "update_choices": [
+        {"id": yes["id"], "is_correct": False}, {"id": no["id"], "is_correct": True}
+    ]}]}
+    assert client.patch(f"{url}/content", json=flip, headers=auth_headers).status_code == 200
+    answer = {"question_id": shown["question"]["id"], "choice_id": yes["id"]}
+    step = client.post(step_url, json={"answer": answer}, headers=auth_headers).json()
+    assert step["ability"] > shown["ability"]
+
+    # the pinned time limit applies too
+    db.execute(update(Attempt).where(Attempt.id == attempt["id"]).values(
+        started_at=datetime.now(timezone.utc) - timedelta(hours=1)
+    ))
+    db.commit()
+    assert client.post(step_url, json={}, headers=auth_headers).status_code == 400
+    assert db.get(Attempt, attempt["id"]).score == 0.0
+
+
+def test_fit_2pl_recovers_item_parameters():
+    rng = np.random.default_rng(0)
+    persons, items, per_person = 2000, 30, 20
+    a = rng.uniform(0.7, 2.0, items)
+    b = rng.normal(0.0, 1.0, items)
+    theta = rng.normal(0.0, 1.0, persons)
+
+    person_idx = np.repeat(np.arange(persons), per_person)
+    item_idx = np.concatenate([rng.choice(items, per_person, replace=False) for _ in range(persons)])
+    p = irt.probability(theta[person_idx], a[item_idx], b[item_idx])
+    correct = rng.random(len(p)) < p
+
+    fit_a, fit_b = irt.fit_2pl(person_idx, item_idx, correct, items)
+    assert np.corrcoef(b, fit_b)[0, 1] > 0.95
+    assert np.corrcoef(a, fit_a)[0, 1] > 0.7
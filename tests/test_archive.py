@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import get_settings
+from app.jobs.archive import archive_before
+from app.models.quiz import Attempt
+from app.services.archive import AttemptArchive, get_archive
+from app.services.attempts import rebuild_summaries
+
+
+@pytest.fixture
+def archive(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_settings(), "archive_dir", str(tmp_path))
+    return get_archive()
+
+
+def test_old_attempts_move_to_archive_and_stay_readable(client, db, auth_headers, quiz, archive):
+    url = f"/quizzes/{quiz['id']}"
+    question = quiz["questions"][0]
+    right, wrong = (c["id"] for c in question["choices"])
+    ids = []
+    for choice_id in (right, wrong, right, wrong):
+        attempt = client.post(f"{url}/start", headers=auth_headers).json()
+        answers = {"answers": [{"question_id": question["id"], "choice_id": choice_id}]}
+        client.post(f"{url}/submit/{attempt['id']}", json=answers, headers=auth_headers)
+        ids.append(attempt["id"])
+
+    for attempt_id, created_at in zip(ids, (datetime(2024, 3, 2), datetime(2024, 3, 20), datetime(2024, 5, 9))):
+        db.execute(update(Attempt).where(Attempt.id == attempt_id).values(created_at=created_at))
+    db.commit()
+
+    assert archive_before(db, archive, date(2025, 1, 1)) == [("2024-03", 2), ("2024-05", 1)]
+    assert [a.id for a in db.query(Attempt).filter(Attempt.quiz_id == quiz["id"])] == [ids[3]]
+
+    # history pages run from the table into the archive
+    first = client.get("/quizzes/my-attempts", params={"limit": 2}, headers=auth_headers)
+    second = client.get("/quizzes/my-attempts", params={"limit": 2, "cursor": first.headers["x-next-cursor"]},
+                        headers=auth_headers)
+    assert [a["id"] for a in first.json() + second.json()] == [ids[3], ids[2], ids[1], ids[0]]
+    assert "x-next-cursor" not in second.headers
+    assert second.json()[1]["score"] == 100.0
+    assert second.json()[1]["quiz_version_id"] == quiz["version_id"]
+
+    stats = client.get(f"{url}/stats").json()
+    assert [(m["month"], m["attempts"], m["average_score"]) for m in stats[:2]] == [
+        ("2024-03", 2, 50.0), ("2024-05", 1, 100.0)
+    ]
+    assert [row["score"] for row in client.get(f"{url}/leaderboard").json()] == [100.0, 100.0, 0.0, 0.0]
+
+    # rebuilding summaries after a re-grade keeps the archived attempts
+    rebuild_summaries(db, quiz["id"])
+    summary = client.get("/quizzes/my-summary", headers=auth_headers).json()[0]
+    assert (summary["attempt_count"], summary["best_score"], summary["last_score"]) == (4, 100.0, 0.0)
+
+
+def test_archived_history_pages_match_full_history(tmp_path):
+    archive = AttemptArchive(str(tmp_path))
+    rng = np.random.default_rng(3)
+    next_id = 1
+    for month in (1, 2, 3):
+        keys = []
+        for quiz_id in (1, 2):
+            # a few hours per month, so created_at ties between attempts are common
+            rows = []
+            for _ in range(15):
+                created_at = datetime(2024, month, 5, tzinfo=timezone.utc) + timedelta(hours=int(rng.integers(0, 4)))
+                rows.append({"id": next_id, "user_id": int(rng.integers(1, 3)), "score": 50.0, "quiz_version_id": None,
+                             "created_at": created_at, "started_at": created_at, "completed_at": created_at})
+                next_id += 1
+            users = archive.write_segment(quiz_id, f"2024-{month:02d}", rows)
+            keys.append((users.astype(np.int64) << 32) | quiz_id)
+        archive.write_month_users(f"2024-{month:02d}", np.concatenate(keys))
+
+    full = archive.user_attempts(1)
+    assert len(full) > 20
+
+    pages, cursor = [], None
+    while True:
+        page = archive.user_history(1, 4, cursor=cursor)
+        pages += page
+        if len(page) < 4:
+            break
+        cursor = page[-1]["id"]
+    assert pages == full
+
+    middle = full[10]
+    since = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    expected = [a for a in full[11:] if a["created_at"] >= since][:5]
+    assert archive.user_history(1, 5, since=since, before=(middle["created_at"], middle["id"])) == expected
+    assert archive.user_history(1, 5, cursor=10**6) == []
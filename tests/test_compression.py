@@ -0,0 +1,73 @@
+import gzip
+
+import brotli
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, choose_encoding, compress
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("br;q=0, *") == "gzip"
+
+
+def test_compression_middleware_small_large_and_streaming():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/large")
+    def large():
+        return {"text": "quiz " * 500}
+
+    @app.get("/export")
+    def export():
+        return StreamingResponse((f"row {i}\n" for i in range(1000)), media_type="text/csv")
+
+    client = TestClient(app)
+    headers = {"Accept-Encoding": "gzip"}
+
+    small_res = client.get("/small", headers=headers)
+    assert "content-encoding" not in small_res.headers
+    # uncompressed answers depend on Accept-Encoding as much as compressed ones
+    assert small_res.headers["vary"] == "Accept-Encoding"
+    assert client.get("/large", headers={"Accept-Encoding": "identity"}).headers["vary"] == "Accept-Encoding"
+
+    large_res = client.get("/large", headers=headers)
+    assert large_res.headers["content-encoding"] == "gzip"
+    assert large_res.headers["vary"] == "Accept-Encoding"
+    assert large_res.json() == {"text": "quiz " * 500}
+
+    # streamed bodies are compressed as they go, without a content-length
+    with client.stream("GET", "/export", headers=headers) as export_res:
+        raw = b"".join(export_res.iter_raw())
+    assert export_res.headers["content-encoding"] == "gzip"
+    assert "content-length" not in export_res.headers
+    assert gzip.decompress(raw).decode().splitlines()[-1] == "row 999"
+
+
+def test_streamed_rows_compress_close_to_one_shot():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+    rows = [f"{i},player{i % 50}@test.com,Quiz {i % 20},{i % 11 * 10}.0,2024-03-{i % 28 + 1:02d}\n" for i in range(1000)]
+
+    @app.get("/export")
+    def export():
+        return StreamingResponse(iter(rows), media_type="text/csv")
+
+    client = TestClient(app)
+    body = "".join(rows).encode()
+    for encoding, decompress in (("gzip", gzip.decompress), ("br", brotli.decompress)):
+        with client.stream("GET", "/export", headers={"Accept-Encoding": encoding}) as res:
+            raw = b"".join(res.iter_raw())
+        assert decompress(raw) == body
+        # one row per chunk must not cost the ratio of compressing the whole body at once
+        assert len(raw) < 1.2 * len(compress(body, encoding))
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.db.session import get_session_factory
+
+
+def test_live_session_full_cycle(client, db, auth_headers, quiz):
+    # connected sockets must not keep a database session open
+    open_sessions, opened = [], []
+
+    @contextmanager
+    def counted_session():
+        open_sessions.append(1)
+        opened.append(1)
+        try:
+            yield db
+        finally:
+            open_sessions.pop()
+
+    client.app.dependency_overrides[get_session_factory] = lambda: counted_session
+
+    # second user plays, the quiz owner hosts
+    client.post("/users/", json={"email": "live@test.com", "username": "liveplayer", "password": "password"})
+    player_token = client.post(
+        "/auth/login", data={"username": "live@test.com", "password": "password"}
+    ).json()["access_token"]
+    host_token = auth_headers["Authorization"].split()[1]
+
+    session_res = client.post(
+        "/live/sessions",
+        json={"quiz_id": quiz["id"], "question_seconds": 5, "reveal_seconds": 0},
+        headers=auth_headers
+    )
+    assert session_res.status_code == 201
+    code = session_res.json()["code"]
+
+    question = quiz["questions"][0]
+    correct_id = [c["id"] for c in question["choices"] if c["is_correct"]][0]
+
+    with client.websocket_connect(f"/live/sessions/{code}/host?token={host_token}") as host_ws:
+        assert host_ws.receive_json() == {"type": "lobby", "players": 0}
+        with client.websocket_connect(f"/live/sessions/{code}/play?token={player_token}") as player_ws:
+            assert player_ws.receive_json()["type"] == "joined"
+            assert host_ws.receive_json() == {"type": "lobby", "players": 1}
+            assert open_sessions == []
+
+            host_ws.send_json({"action": "start"})
+            pushed = player_ws.receive_json()
+            assert pushed["type"] == "question"
+            # the answer key never reaches players
+            assert "is_correct" not in pushed["question"]["choices"][0]
+
+            player_ws.send_json({"question_id": question["id"], "choice_id": correct_id})
+            board = player_ws.receive_json()
+            assert board["type"] == "leaderboard"
+            assert board["top"] == [{"rank": 1, "username": "liveplayer", "correct": 1}]
+            assert player_ws.receive_json()["type"] == "finished"
+
+        # host socket is closed by the server after results are saved
+        messages = []
+        try:
+            while True:
+                messages.append(host_ws.receive_json()["type"])
+        except Exception:
+            pass
+        assert "finished" in messages
+    # host and player logins, then the results
+    assert len(opened) == 3
+
+    attempts = client.get("/quizzes/my-attempts", headers={"Authorization": f"Bearer {player_token}"}).json()
+    assert len(attempts) == 1
+    assert attempts[0]["score"] == 100.0
+    assert attempts[0]["completed_at"] is not None
+
+
+def test_live_session_has_one_host(client, auth_headers, quiz):
+    host_token = auth_headers["Authorization"].split()[1]
+    code = client.post(
+        "/live/sessions",
+        json={"quiz_id": quiz["id"], "question_seconds": 5, "reveal_seconds": 0},
+        headers=auth_headers
+    ).json()["code"]
+
+    with client.websocket_connect(f"/live/sessions/{code}/host?token={host_token}") as host_ws:
+        assert host_ws.receive_json() == {"type": "lobby", "players": 0}
+        # a second socket of the same host must not be able to start the session again
+        with pytest.raises(WebSocketDisconnect) as rejected:
+            with client.websocket_connect(f"/live/sessions/{code}/host?token={host_token}"):
+                pass
+        assert rejected.value.code == 1008
@@ -0,0 +1,14 @@
+from datetime import date, datetime, timezone
+
+from app.db.partitions import add_months, partition_month, partition_name, retention_cutoff
+
+
+def test_partition_month_helpers():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 3, 1)) == "attempts_p202603"
+    assert partition_month("attempts_p202603") == date(2026, 3, 1)
+    assert partition_month("attempts_default") is None
+
+    now = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    assert retention_cutoff(12, now) == date(2025, 10, 1)
@@ -1,4 +1,20 @@
+from datetime import datetime, timedelta, timezone
+
+import msgpack
 import pytest
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app.db.base import Base
+from app.jobs.dedup import duplicate_clusters
+from app.jobs.purge import purge_quiz
+from app.jobs.regrade import resume_stale_jobs
+from app.services.attempts import rebuild_summaries
+from app.models.quiz import Attempt, AttemptAnswer, Choice, Question, Quiz, RegradeJob
+from app.models.user import User
+from app.schemas.quiz import QuizContentPatch
+from app.services.content import apply_content_patch
+from app.services.versions import render_content
 
 def test_create_quiz_full_cycle(client, db):
     # 1. imitate user registration and login to get auth token
@@ -46,4 +62,309 @@ def test_create_quiz_full_cycle(client, db):
     submit_res = client.post(f"/quizzes/{quiz_id}/submit/{attempt_id}", json=submit_data, headers=headers)
     
     assert submit_res.status_code == 200
-    assert submit_res.json()["score"] == 100.0
\ No newline at end of file
+    assert submit_res.json()["score"] == 100.0
+
+def test_submit_quiz_idempotency_key_replays_response(client, auth_headers, quiz):
+    attempt_id = client.post(f"/quizzes/{quiz['id']}/start", headers=auth_headers).json()["id"]
+    question = quiz["questions"][0]
+    c_id = [c["id"] for c in question["choices"] if c["is_correct"]][0]
+    submit_data = {"answers": [{"question_id": question["id"], "choice_id": c_id}]}
+    url = f"/quizzes/{quiz['id']}/submit/{attempt_id}"
+
+    first = client.post(url, json=submit_data, headers={**auth_headers, "Idempotency-Key": "abc"})
+    retry = client.post(url, json=submit_data, headers={**auth_headers, "Idempotency-Key": "abc"})
+
+    assert first.status_code == 200
+    assert first.json()["completed_at"] is not None
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+
+    # a different key is a new submission and the attempt is already finished
+    other = client.post(url, json=submit_data, headers={**auth_headers, "Idempotency-Key": "xyz"})
+    assert other.status_code == 400
+
+
+def test_msgpack_negotiation(client, auth_headers):
+    quiz_data = {
+        "title": "Packed",
+        "questions": [{"text": "1 + 1?", "choices": [{"text": "2", "is_correct": True}]}]
+    }
+    headers = {**auth_headers, "Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    create_res = client.post("/quizzes/", content=msgpack.packb(quiz_data), headers=headers)
+    assert create_res.status_code == 201
+    assert create_res.headers["content-type"] == "application/msgpack"
+    created = msgpack.unpackb(create_res.content)
+    assert created["questions"][0]["choices"][0]["is_correct"] is True
+
+    # JSON stays the default and both encodings carry the same data
+    json_res = client.get(f"/quizzes/{created['id']}")
+    packed_res = client.get(f"/quizzes/{created['id']}", headers={"Accept": "application/msgpack"})
+    assert json_res.headers["content-type"] == "application/json"
+    assert msgpack.unpackb(packed_res.content) == json_res.json()
+    assert "Accept" in packed_res.headers["vary"]
+
+
+def test_quiz_edit_creates_new_version(client, auth_headers, quiz):
+    url = f"/quizzes/{quiz['id']}"
+    first = client.get(url)
+    assert first.json()["title"] == "Fixture Quiz"
+    old_version = first.json()["version_id"]
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    attempt = client.post(f"{url}/start", headers=auth_headers).json()
+    assert attempt["quiz_version_id"] == old_version
+
+    client.patch(url, json={"title": "Renamed"}, headers=auth_headers)
+    current = client.get(url).json()
+    assert current["title"] == "Renamed"
+    assert current["version_id"] != old_version
+
+    # the pinned version stays available unchanged and is cacheable forever
+    pinned = client.get(f"{url}/versions/{old_version}")
+    assert pinned.json()["title"] == "Fixture Quiz"
+    assert "immutable" in pinned.headers["cache-control"]
+
+
+def test_delete_quiz_hides_then_purges_in_batches(client, db, auth_headers):
+    quiz_data = {
+        "title": "Doomed",
+        "questions": [
+            {"text": f"Q{n}", "choices": [{"text": "a", "is_correct": True}, {"text": "b", "is_correct": False}]}
+            for n in range(3)
+        ]
+    }
+    quiz = client.post("/quizzes/", json=quiz_data, headers=auth_headers).json()
+    client.post(f"/quizzes/{quiz['id']}/start", headers=auth_headers)
+    # live quizzes are never purged
+    assert purge_quiz(db, quiz["id"]) == 0
+    assert db.query(Question).filter(Question.quiz_id == quiz["id"]).count() == 3
+
+    assert client.delete(f"/quizzes/{quiz['id']}", headers=auth_headers).status_code == 204
+    assert client.get(f"/quizzes/{quiz['id']}").status_code == 404
+    assert client.get(f"/quizzes/{quiz['id']}/leaderboard").status_code == 404
+    assert all(q["id"] != quiz["id"] for q in client.get("/quizzes/").json())
+
+    # 6 choices + 3 x (20 buckets + 1 signature + 1 question) + 1 attempt + 1 version + the quiz,
+    # two rows per statement
+    assert purge_quiz(db, quiz["id"], batch_size=2) == 75
+    assert db.query(Question).filter(Question.quiz_id == quiz["id"]).count() == 0
+    assert db.get(Quiz, quiz["id"]) is None
+
+
+def test_patch_quiz_content_keeps_ids_and_old_scoring(client, auth_headers, quiz):
+    url = f"/quizzes/{quiz['id']}"
+    question = quiz["questions"][0]
+    right, wrong = question["choices"]
+    attempt = client.post(f"{url}/start", headers=auth_headers).json()
+
+    patch = {
+        "base_version_id": quiz["version_id"],
+        "add_questions": [{"text": "3 + 3?", "choices": [{"text": "6", "is_correct": True}]}],
+        "update_questions": [{
+            "id": question["id"],
+            "text": "2 + 2 = ?",
+            "update_choices": [{"id": right["id"], "is_correct": False}, {"id": wrong["id"], "is_correct": True}],
+            "add_choices": [{"text": "22", "is_correct": False}]
+        }]
+    }
+    res = client.patch(f"{url}/content", json=patch, headers=auth_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["version_id"] != quiz["version_id"]
+    edited = body["questions"][0]
+    assert edited["id"] == question["id"] and edited["text"] == "2 + 2 = ?"
+    assert [c["id"] for c in edited["choices"][:2]] == [right["id"], wrong["id"]]
+    assert len(edited["choices"]) == 3 and len(body["questions"]) == 2
+
+    # stale base version and foreign ids are rejected
+    assert client.patch(f"{url}/content", json=patch, headers=auth_headers).status_code == 409
+    assert client.patch(f"{url}/content", json={"remove_questions": [10**6]}, headers=auth_headers).status_code == 400
+
+    # the attempt started before the edit is scored on its own version
+    answers = {"answers": [{"question_id": question["id"], "choice_id": right["id"]}]}
+    assert client.post(f"{url}/submit/{attempt['id']}", json=answers, headers=auth_headers).json()["score"] == 100.0
+
+    res = client.patch(f"{url}/content", json={"remove_questions": [question["id"]]}, headers=auth_headers)
+    assert [q["text"] for q in res.json()["questions"]] == ["3 + 3?"]
+
+
+def test_regrade_after_answer_key_fix(client, db, auth_headers):
+    quiz_data = {
+        "title": "Wrong Key",
+        "questions": [
+            {"text": "1 + 1?", "choices": [{"text": "2", "is_correct": False}, {"text": "3", "is_correct": True}]},
+            {"text": "2 + 2?", "choices": [{"text": "4", "is_correct": True}, {"text": "5", "is_correct": False}]}
+        ]
+    }
+    quiz = client.post("/quizzes/", json=quiz_data, headers=auth_headers).json()
+    url = f"/quizzes/{quiz['id']}"
+    first, second = quiz["questions"]
+    two, three = first["choices"]
+    four = second["choices"][0]
+
+    for choice in (two, three):
+        attempt = client.post(f"{url}/start", headers=auth_headers).json()
+        answers = [{"question_id": first["id"], "choice_id": choice["id"]}, {"question_id": second["id"], "choice_id": four["id"]}]
+        client.post(f"{url}/submit/{attempt['id']}", json={"answers": answers}, headers=auth_headers)
+    before = {a["id"]: a["score"] for a in client.get("/quizzes/my-attempts", headers=auth_headers).json()}
+    assert sorted(before.values()) == [50.0, 100.0]
+    # finished a month apart, the re-grade must keep both finish times
+    finished = {i: datetime(2024, month, 1, tzinfo=timezone.utc) for month, i in enumerate(sorted(before), start=1)}
+    for attempt_id, completed_at in finished.items():
+        db.execute(update(Attempt).where(Attempt.id == attempt_id).values(completed_at=completed_at))
+    rebuild_summaries(db, quiz["id"])
+    db.commit()
+
+    fix = {"update_questions": [{"id": first["id"], "update_choices": [
+        {"id": two["id"], "is_correct": True}, {"id": three["id"], "is_correct": False}
+    ]}]}
+    client.patch(f"{url}/content", json=fix, headers=auth_headers)
+
+    job = client.post(f"{url}/regrade", headers=auth_headers).json()
+    assert job["status"] == "pending" and job["total"] == 2
+    # one active job per quiz
+    assert client.post(f"{url}/regrade", headers=auth_headers).status_code == 409
+
+    # a job cut off by a restart is picked up once it went stale
+    assert resume_stale_jobs(db, timedelta(minutes=15), chunk_size=1) == []
+    db.execute(update(RegradeJob).where(RegradeJob.id == job["id"]).values(
+        status="running", updated_at=datetime.now(timezone.utc) - timedelta(hours=1)
+    ))
+    db.commit()
+    assert [j.id for j in resume_stale_jobs(db, timedelta(minutes=15), chunk_size=1)] == [job["id"]]
+
+    job = client.get(f"{url}/regrade/{job['id']}", headers=auth_headers).json()
+    assert (job["status"], job["processed"], job["changed"]) == ("finished", 2, 2)
+    after = {a["id"]: a["score"] for a in client.get("/quizzes/my-attempts", headers=auth_headers).json()}
+    assert {i: 150.0 - s for i, s in before.items()} == after
+    # summaries are rebuilt from the re-graded scores
+    summary = client.get("/quizzes/my-summary", headers=auth_headers).json()[0]
+    assert summary["last_score"] == after[max(after)] == 50.0
+    assert summary["last_attempt_at"].startswith("2024-02-01")
+    kept = {a.id: a.completed_at.replace(tzinfo=timezone.utc) for a in db.query(Attempt).filter(Attempt.id.in_(finished))}
+    assert kept == finished
+
+
+def test_my_attempts_pages_and_summary(client, auth_headers, quiz):
+    url = f"/quizzes/{quiz['id']}"
+    question = quiz["questions"][0]
+    right, wrong = (c["id"] for c in question["choices"])
+    for choice_id in (wrong, right, wrong, right, wrong):
+        attempt = client.post(f"{url}/start", headers=auth_headers).json()
+        answers = {"answers": [{"question_id": question["id"], "choice_id": choice_id}]}
+        client.post(f"{url}/submit/{attempt['id']}", json=answers, headers=auth_headers)
+
+    # attempts land in the same second on sqlite, the id tie-break keeps pages disjoint
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/quizzes/my-attempts", params=params, headers=auth_headers)
+        seen += [a["id"] for a in page.json()]
+        cursor = page.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert len(seen) == 5 and seen == sorted(seen, reverse=True)
+
+    summary = client.get("/quizzes/my-summary", headers=auth_headers).json()
+    assert summary == [{
+        "quiz_id": quiz["id"],
+        "quiz_title": "Fixture Quiz",
+        "attempt_count": 5,
+        "best_score": 100.0,
+        "last_score": 0.0,
+        "average_score": 40.0,
+        "last_attempt_at": summary[0]["last_attempt_at"]
+    }]
+
+
+def test_near_duplicate_questions_are_flagged(client, db, auth_headers):
+    choices = [{"text": "a", "is_correct": True}, {"text": "b", "is_correct": False}]
+    texts = ["What is the capital city of France?", "How many legs does a spider have?"]
+    bank = client.post("/quizzes/", json={
+        "title": "Bank", "questions": [{"text": t, "choices": choices} for t in texts]
+    }, headers=auth_headers).json()
+    france, spider = (q["id"] for q in bank["questions"])
+
+    check = {"questions": [
+        "what is the CAPITAL city of France",
+        "Which planet is closest to the Sun?",
+        "Which planet is closest to the sun??",
+    ]}
+    flagged = client.post("/quizzes/duplicates", json=check, headers=auth_headers).json()
+    assert [(r["index"], [m["question_id"] or m["batch_index"] for m in r["matches"]]) for r in flagged] == [
+        (0, [france]), (2, [1])
+    ]
+    assert flagged[0]["matches"][0] == {
+        "question_id": france, "quiz_id": bank["id"], "batch_index": None, "similarity": 1.0
+    }
+
+    # edited text is re-indexed, the old wording no longer matches
+    client.patch(f"/quizzes/{bank['id']}/content", json={
+        "update_questions": [{"id": spider, "text": "Which planet is closest to the Sun?"}]
+    }, headers=auth_headers)
+    flagged = client.post("/quizzes/duplicates", json={
+        "questions": ["How many legs does a spider have?", "Which planet is closest to the sun"]
+    }, headers=auth_headers).json()
+    assert [r["index"] for r in flagged] == [1]
+
+    copy = client.post("/quizzes/", json={
+        "title": "Copy", "questions": [{"text": "What is the capital city of France", "choices": choices}]
+    }, headers=auth_headers).json()
+    assert duplicate_clusters(db, threshold=0.8) == [[france, copy["questions"][0]["id"]]]
+
+    client.delete(f"/quizzes/{copy['id']}", headers=auth_headers)
+    assert duplicate_clusters(db, threshold=0.8) == []
+
+
+def test_submit_uses_the_pinned_version(client, db, auth_headers, quiz):
+    url = f"/quizzes/{quiz['id']}"
+    question = quiz["questions"][0]
+    answers = {"answers": [{"question_id": question["id"], "choice_id": question["choices"][0]["id"]}]}
+    first = client.post(f"{url}/start", headers=auth_headers).json()
+    second = client.post(f"{url}/start", headers=auth_headers).json()
+
+    # a time limit set after the attempt started does not apply to it
+    db.execute(update(Quiz).where(Quiz.id == quiz["id"]).values(time_limit=1))
+    db.execute(update(Attempt).where(Attempt.id == first["id"]).values(
+        started_at=datetime.now(timezone.utc) - timedelta(hours=1)
+    ))
+    # the version of the second one was purged
+    db.execute(update(Attempt).where(Attempt.id == second["id"]).values(quiz_version_id="0" * 64))
+    db.commit()
+
+    res = client.post(f"{url}/submit/{first['id']}", json=answers, headers=auth_headers)
+    assert res.status_code == 200 and res.json()["score"] == 100.0
+    res = client.post(f"{url}/submit/{second['id']}", json=answers, headers=auth_headers)
+    assert res.status_code == 410
+
+
+def test_removed_questions_keep_recorded_answers():
+    # the shared test database does not enforce foreign keys, this one does
+    fk_engine = create_engine("sqlite://", poolclass=StaticPool)
+    event.listen(fk_engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(fk_engine)
+    with Session(fk_engine) as session:
+        user = User(email="fk@test.com", username="fk", hashed_password="x")
+        session.add(user)
+        session.flush()
+        quiz = Quiz(title="FK", creator_id=user.id, questions=[
+            Question(text=text, choices=[Choice(text="yes", is_correct=True)]) for text in ("a?", "b?")
+        ])
+        session.add(quiz)
+        session.flush()
+        removed, kept = quiz.questions
+        attempt = Attempt(user_id=user.id, quiz_id=quiz.id, score=100.0)
+        session.add(attempt)
+        session.flush()
+        session.add(AttemptAnswer(attempt_id=attempt.id, question_id=removed.id,
+                                  choice_id=removed.choices[0].id, is_correct=True))
+        session.commit()
+
+        apply_content_patch(session, quiz.id, QuizContentPatch(remove_questions=[removed.id]))
+        session.commit()
+        session.expire_all()
+
+        assert session.query(AttemptAnswer).filter(AttemptAnswer.question_id == removed.id).count() == 1
+        assert [q.id for q in session.get(Quiz, quiz.id).questions] == [kept.id]
+        assert [q["id"] for q in render_content(session, quiz)["questions"]] == [kept.id]
+    fk_engine.dispose()